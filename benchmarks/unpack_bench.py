@@ -0,0 +1,295 @@
+"""
+UnpackEngine 解压吞吐基准测试 (只依赖标准库后端，可在 Linux 上直接运行)。
+
+在临时目录生成可复现的合成数据 (固定随机种子)，按 场景 x 后端 x 线程数 逐一完整运行引擎，
+输出 archives/s、MB/s (按压缩包大小计)、password-attempts/s：
+
+    python benchmarks/unpack_bench.py
+    python benchmarks/unpack_bench.py --workers 1,2,4,8,0 --scale 4 --json bench.json
+    python benchmarks/unpack_bench.py --scenario encrypted --decoys 500 --password-workers 4
+
+场景:
+    small      大量小 zip
+    large      少量大 tar
+    volumes    按字节切分的多卷集 (name.zip.001 / name.tar.001 ...)
+    encrypted  ZipCrypto 加密 zip，说明文件里有 N 个干扰密码，正确密码在最后一行
+               (候选按说明文件行序尝试：最先处理的压缩包要试完全部干扰密码，命中后密码池会把正确密码提前；
+               workers > 1 时首批同时开始的压缩包各自试完一遍)
+
+--engine-path 指定 WinRAR / Bandizip 时会额外以 external 后端 (prefer_builtin=False) 跑一遍。
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import struct
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import threading
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ("small", "large", "volumes", "encrypted")
+BENCH_PASSWORD = "bench-secret"
+
+
+# ========== 合成数据 ==========
+
+def _payload(rng: random.Random, size: int) -> bytes:
+    """约一半可压缩的数据：随机块重复两次，接近常见文件的压缩率"""
+    half = rng.randbytes(max(1, size // 2))
+    return (half + half)[:size]
+
+
+def _write_zip(path: str, files: Dict[str, bytes], method: int = zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, "w", compression=method) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+
+def _write_tar(path: str, files: Dict[str, bytes]):
+    with tarfile.open(path, "w") as tf:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 0
+            tf.addfile(info, _BytesReader(data))
+
+
+class _BytesReader:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._pos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        end = len(self._data) if n < 0 else self._pos + n
+        chunk = self._data[self._pos:end].tobytes()
+        self._pos += len(chunk)
+        return chunk
+
+
+def _split_file(path: str, part_size: int) -> List[str]:
+    """按字节切分为 path.001, path.002 ... 并删除原文件"""
+    parts = []
+    with open(path, "rb") as src:
+        n = 1
+        while True:
+            chunk = src.read(part_size)
+            if not chunk:
+                break
+            part = f"{path}.{n:03d}"
+            with open(part, "wb") as dst:
+                dst.write(chunk)
+            parts.append(part)
+            n += 1
+    os.remove(path)
+    return parts
+
+
+class _ZipCryptoKeys:
+    """传统 PKWARE 加密 (ZipCrypto) 的密钥流，zipfile 只能读不能写，这里自行生成测试数据"""
+
+    def __init__(self, pwd: bytes):
+        self.k0, self.k1, self.k2 = 0x12345678, 0x23456789, 0x34567890
+        for b in pwd:
+            self._update(b)
+
+    @staticmethod
+    def _crc(crc: int, b: int) -> int:
+        return zlib.crc32(bytes([b]), crc ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+    def _update(self, b: int):
+        self.k0 = self._crc(self.k0, b)
+        self.k1 = ((self.k1 + (self.k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        self.k2 = self._crc(self.k2, (self.k1 >> 24) & 0xFF)
+
+    def encrypt(self, data: bytes) -> bytes:
+        out = bytearray(len(data))
+        for i, b in enumerate(data):
+            t = (self.k2 | 2) & 0xFFFF
+            out[i] = b ^ (((t * (t ^ 1)) >> 8) & 0xFF)
+            self._update(b)
+        return bytes(out)
+
+
+def _write_encrypted_zip(path: str, files: Dict[str, bytes], pwd: str, rng: random.Random):
+    """写出 ZipCrypto 加密 + Deflate 的 zip"""
+    central = []
+    with open(path, "wb") as out:
+        for name, data in files.items():
+            crc = zlib.crc32(data)
+            co = zlib.compressobj(6, zlib.DEFLATED, -15)
+            comp = co.compress(data) + co.flush()
+            # 12 字节加密头，最后一字节为 CRC 高位 (解压端据此做密码校验)
+            header = rng.randbytes(11) + bytes([(crc >> 24) & 0xFF])
+            enc = _ZipCryptoKeys(pwd.encode("utf-8")).encrypt(header + comp)
+            name_b = name.encode("utf-8")
+            offset = out.tell()
+            out.write(struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x1 | 0x800, 8, 0, 0,
+                                  crc, len(enc), len(data), len(name_b), 0) + name_b + enc)
+            central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, 0x1 | 0x800, 8, 0, 0,
+                                       crc, len(enc), len(data), len(name_b), 0, 0, 0, 0, 0, offset) + name_b)
+        cd_offset = out.tell()
+        for entry in central:
+            out.write(entry)
+        cd_size = out.tell() - cd_offset
+        out.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central), cd_size, cd_offset, 0))
+
+
+def build_tree(root: str, scenario: str, scale: float, decoys: int, seed: int = 20240101) -> str:
+    """生成一个场景的源目录，返回其路径 (--workdir 重复使用时先清掉上次的数据，参数可能不同)"""
+    rng = random.Random(f"{seed}-{scenario}")
+    src = os.path.join(root, scenario)
+    shutil.rmtree(src, ignore_errors=True)
+    os.makedirs(src)
+    if scenario == "small":
+        for i in range(max(1, int(400 * scale))):
+            sub = os.path.join(src, f"d{i % 20:02d}")
+            os.makedirs(sub, exist_ok=True)
+            _write_zip(os.path.join(sub, f"small_{i:05d}.zip"),
+                       {f"file_{j}.bin": _payload(rng, 4096) for j in range(4)})
+    elif scenario == "large":
+        for i in range(max(1, int(2 * scale))):
+            _write_tar(os.path.join(src, f"large_{i}.tar"),
+                       {f"blob_{j}.bin": _payload(rng, 16 * 1024 * 1024) for j in range(2)})
+    elif scenario == "volumes":
+        for i in range(max(1, int(4 * scale))):
+            zpath = os.path.join(src, f"vol_{i}.zip")
+            _write_zip(zpath, {f"part_{j}.bin": _payload(rng, 4 * 1024 * 1024) for j in range(2)})
+            _split_file(zpath, 1024 * 1024)
+            tpath = os.path.join(src, f"vol_{i}.tar")
+            _write_tar(tpath, {f"part_{j}.bin": _payload(rng, 4 * 1024 * 1024) for j in range(2)})
+            _split_file(tpath, 1024 * 1024)
+    elif scenario == "encrypted":
+        for i in range(max(1, int(20 * scale))):
+            _write_encrypted_zip(os.path.join(src, f"enc_{i:03d}.zip"),
+                                 {f"secret_{j}.bin": _payload(rng, 64 * 1024) for j in range(2)},
+                                 BENCH_PASSWORD, rng)
+        # 正确密码排在所有干扰密码之后，测得的是最坏情况下的试密码速度
+        lines = [f"密码: decoy-{n:05d}" for n in range(decoys)] + [f"密码: {BENCH_PASSWORD}"]
+        with open(os.path.join(src, "password.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+    else:
+        raise ValueError(scenario)
+    return src
+
+
+# ========== 运行 ==========
+
+def run_once(src: str, out_dir: str, workers: int, password_workers: int, backend: str,
+             engine_path: str = "") -> dict:
+    from src.core.unpack_engine import UnpackEngine
+
+    done = threading.Event()
+    result = {}
+    errors = []
+
+    def _log(msg: str, level: str = "info"):
+        if level == "error":
+            errors.append(msg)
+
+    def _fin(stats: dict, aborted: bool = False):
+        result.update(stats=dict(stats), aborted=aborted)
+        done.set()
+
+    cfg = {
+        "source_folder": src,
+        "output_mode": "custom_smart",
+        "custom_output_path": out_dir,
+        "engine": "WinRAR",
+        "engine_path": engine_path,
+        "max_workers": workers,
+        "password_workers": password_workers,
+        "prefer_builtin": backend == "builtin",
+        # 每轮都从零开始：不跳过、不续传、不使用上一轮的密码命中统计
+        "use_index": False,
+        "resume_journal": False,
+        "password_stats": False,
+        "per_device_limits": False,
+        "check_free_space": False,
+    }
+    engine = UnpackEngine(_log, lambda _v: None, _fin)
+    t0 = time.perf_counter()
+    engine.start_task(cfg, "")
+    done.wait()
+    wall = time.perf_counter() - t0
+    summary = engine.metrics.summary(wall)
+    return {
+        "wall_time": round(wall, 3),
+        "archives": summary["success"],
+        "failed": summary["fail"],
+        "bytes": summary["bytes"],
+        "attempts": summary["attempts"],
+        "archives_per_sec": round(summary["success"] / wall, 2) if wall else 0.0,
+        "mb_per_sec": round(summary["bytes"] / wall / 1048576, 2) if wall else 0.0,
+        "attempts_per_sec": round(summary["attempts"] / wall, 1) if wall else 0.0,
+        "errors": errors[:5],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="UnpackEngine 解压吞吐基准测试")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="只运行指定场景，可重复 (默认全部)")
+    parser.add_argument("--workers", default="1,2,4,8", help="逗号分隔的 max_workers 列表，0 = 自适应")
+    parser.add_argument("--password-workers", type=int, default=1, help="单个压缩包并行试密码数")
+    parser.add_argument("--scale", type=float, default=1.0, help="数据量倍数")
+    parser.add_argument("--decoys", type=int, default=200, help="加密场景的干扰密码数")
+    parser.add_argument("--repeat", type=int, default=1, help="每个组合重复次数，取最快一次")
+    parser.add_argument("--engine-path", default="", help="外部解压工具路径 (额外测试 external 后端)")
+    parser.add_argument("--workdir", help="生成数据的目录 (默认系统临时目录，结束后删除)")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    workers_list = [int(w) for w in args.workers.split(",") if w.strip()]
+    backends = ["builtin"] + (["external"] if args.engine_path else [])
+    scenarios = args.scenario or list(SCENARIOS)
+
+    root = args.workdir or tempfile.mkdtemp(prefix="unpack_bench_")
+    os.makedirs(root, exist_ok=True)
+    # 配置、索引与日志写到临时目录，不影响真实的工具箱数据
+    os.environ["TOOLBOX_HOME"] = os.path.join(root, "home")
+    results = []
+    try:
+        for scenario in scenarios:
+            t0 = time.perf_counter()
+            src = build_tree(root, scenario, args.scale, args.decoys)
+            print(f"[{scenario}] 数据生成完成 ({time.perf_counter() - t0:.1f}s)", flush=True)
+            for backend in backends:
+                for workers in workers_list:
+                    best = None
+                    for _ in range(max(1, args.repeat)):
+                        out_dir = os.path.join(root, "out")
+                        # 上次运行被中断时可能残留输出
+                        shutil.rmtree(out_dir, ignore_errors=True)
+                        res = run_once(src, out_dir, workers, args.password_workers, backend, args.engine_path)
+                        shutil.rmtree(out_dir, ignore_errors=True)
+                        if best is None or res["wall_time"] < best["wall_time"]:
+                            best = res
+                    best.update(scenario=scenario, backend=backend, workers=workers,
+                                password_workers=args.password_workers)
+                    results.append(best)
+                    print(f"  {backend:<8} workers={workers or 'auto':<4} "
+                          f"{best['archives']:>5} 个 / {best['wall_time']:>7.2f}s  "
+                          f"{best['archives_per_sec']:>8.1f} archives/s  "
+                          f"{best['mb_per_sec']:>8.1f} MB/s  "
+                          f"{best['attempts_per_sec']:>9.1f} attempts/s ({best['attempts']} 次)"
+                          + (f"  失败 {best['failed']}" if best["failed"] else ""), flush=True)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+    return 1 if any(r["failed"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,14 @@
-from src.gui.app import App
+import sys
+import multiprocessing
 
 if __name__ == "__main__":
+    # 打包为 exe 后，图标转换的子进程需要由此进入
+    multiprocessing.freeze_support()
+    # 带参数启动时走命令行模式，不加载图形界面
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+        sys.exit(cli_main())
+
+    from src.gui.app import App
     app = App()
     app.mainloop()
-
@@ -0,0 +1,297 @@
+"""
+命令行入口 (无需图形界面)，供服务器 / 计划任务批量调用。
+
+用法:
+    python main.py unpack <源文件夹> [选项]
+    python main.py icon <图片 / 文件夹 / 通配符...> [选项] [--watch]
+    python -m src.cli unpack <源文件夹> [选项]
+
+退出码: 0 = 全部成功, 1 = 存在失败, 2 = 已中止 / 参数错误, 130 = Ctrl+C 中断
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config.manager import ConfigManager
+from src.core.icon_engine import IconEngine, IMAGE_EXTS, ICON_QUALITY
+from src.core.unpack_engine import UnpackEngine, OUTPUT_MODES
+from src.utils.watch import ChangeTracker, FolderWatcher, expand_inputs
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_ABORTED = 2
+EXIT_INTERRUPTED = 130
+
+
+class ConsoleReporter:
+    """把引擎回调输出到终端：默认为带时间戳的文本行，--json 时为每行一个 JSON 事件"""
+
+    def __init__(self, as_json: bool, quiet: bool = False):
+        self.as_json = as_json
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._last_pct = -1
+
+    def _emit(self, event: dict):
+        with self._lock:
+            if self.as_json:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            else:
+                t = datetime.now().strftime("%H:%M:%S")
+                if event["event"] == "progress":
+                    line = f"[{t}] [progress] {event['value'] * 100:.1f}%"
+                elif event["event"] == "finish":
+                    line = f"[{t}] [finish] " + json.dumps(event["stats"], ensure_ascii=False)
+                else:
+                    line = f"[{t}] [{event['level']}] {event['message']}"
+                print(line, flush=True)
+
+    def log(self, msg: str, level: str = "info"):
+        if self.quiet and level == "info":
+            return
+        self._emit({"event": "log", "level": level, "message": msg, "ts": time.time()})
+
+    def progress(self, value: float):
+        # 只在整数百分比变化时输出，避免刷屏
+        pct = int(value * 100)
+        if pct == self._last_pct:
+            return
+        self._last_pct = pct
+        if not self.quiet:
+            self._emit({"event": "progress", "value": round(value, 4), "ts": time.time()})
+
+    def finish(self, stats: dict, aborted: bool = False):
+        self._last_pct = -1
+        self._emit({"event": "finish", "aborted": aborted, "stats": stats, "ts": time.time()})
+
+
+def _build_unpack_cfg(args: argparse.Namespace) -> dict:
+    """与界面相同的配置键：以保存的配置为基础，命令行参数覆盖"""
+    cfg = ConfigManager().load_config()
+    if args.engine:
+        cfg["engine"] = args.engine
+    if args.workers is not None:
+        cfg["max_workers"] = args.workers
+    if args.password_workers is not None:
+        cfg["password_workers"] = args.password_workers
+    if args.delete_source:
+        cfg["delete_source"] = True
+    if args.no_index:
+        cfg["use_index"] = False
+    if args.no_builtin:
+        cfg["prefer_builtin"] = False
+    if args.recursive is not None:
+        cfg["recursive_unpack"] = True
+        cfg["recursive_depth"] = args.recursive
+    if args.metrics:
+        cfg["metrics_path"] = args.metrics
+
+    mode = args.mode or OUTPUT_MODES.get(cfg.get("last_output_mode", ""), "current")
+    engine_path = args.engine_path or (cfg["winrar_path"] if cfg["engine"] == "WinRAR" else cfg["bandizip_path"])
+    cfg.update({
+        "source_folder": args.source,
+        "output_mode": mode,
+        "custom_output_path": args.dest or "",
+        "engine_path": engine_path,
+    })
+    return cfg
+
+
+def run_unpack(args: argparse.Namespace) -> int:
+    reporter = ConsoleReporter(args.json, args.quiet)
+    done = threading.Event()
+    result = {}
+
+    def _fin(stats: dict, aborted: bool = False):
+        reporter.finish(stats, aborted)
+        result.update(stats=dict(stats), aborted=aborted)
+        done.set()
+
+    engine = UnpackEngine(reporter.log, reporter.progress, _fin)
+    engine.start_task(_build_unpack_cfg(args), " ".join(args.password or []))
+    try:
+        # 带超时地等待，保证 Ctrl+C 能及时被响应
+        while not done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        engine.stop()
+        done.wait()
+        return EXIT_INTERRUPTED
+
+    if result.get("aborted"):
+        return EXIT_ABORTED
+    return EXIT_FAILED if result["stats"].get("fail") else EXIT_OK
+
+
+def _icon_size_mode(args: argparse.Namespace):
+    """命令行尺寸参数 -> 界面下拉框的 size_mode 与自定义尺寸"""
+    if args.svg:
+        return "SVG", ""
+    if args.size == "standard":
+        return "标准", ""
+    return "自定义", args.size
+
+
+def _icon_out_dir(args: argparse.Namespace, cfg: dict) -> str:
+    return args.out or cfg["icon_output_path"]
+
+
+def _split_conflicts(entries: List[Tuple[str, str]], out_dir: str, ext: str
+                     ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    同一输出路径只保留排序在前的输入 (如 a.png 与 a.jpg 都会输出 a.ico)。
+    返回 (可转换的 [(路径, 子目录)], 冲突的 [(路径, 占用该输出的路径)])
+    """
+    owners: Dict[str, str] = {}
+    accepted, conflicts = [], []
+    for path, rel in entries:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        target = os.path.normcase(os.path.join(out_dir, rel, stem + ext))
+        owner = owners.setdefault(target, path)
+        if owner == path:
+            accepted.append((path, rel))
+        else:
+            conflicts.append((path, owner))
+    return accepted, conflicts
+
+
+def _convert_icons(args: argparse.Namespace, cfg: dict, entries: List[Tuple[str, str]],
+                   reporter: ConsoleReporter) -> dict:
+    """转换一批图片 [(路径, 输出子目录)]，阻塞到完成并返回统计"""
+    done = threading.Event()
+    result = {}
+
+    def _fin(stats: dict):
+        reporter.finish(stats)
+        result.update(stats)
+        done.set()
+
+    size_mode, custom_size = _icon_size_mode(args)
+    crop = cfg.get("icon_auto_crop", True) if args.crop is None else args.crop
+    workers = cfg.get("icon_workers", 0) if args.workers is None else args.workers
+    cache_mb = 0 if args.no_cache else int(cfg.get("icon_cache_mb", 0))
+    engine = IconEngine(reporter.log, reporter.progress, _fin)
+    engine.start([p for p, _ in entries], _icon_out_dir(args, cfg), size_mode, custom_size, crop,
+                 int(workers), args.quality or cfg.get("icon_quality", "high"),
+                 cache_mb, bool(cfg.get("icon_cache_link", False)), [rel for _, rel in entries])
+    while not done.wait(0.5):
+        pass
+    return result
+
+
+def run_icon(args: argparse.Namespace) -> int:
+    reporter = ConsoleReporter(args.json, args.quiet)
+    if not args.svg and args.size != "standard" and not (args.size.isdigit() and int(args.size) > 0):
+        reporter.log(f"❌ 无效的尺寸: {args.size} (应为 standard 或正整数)", "error")
+        return EXIT_ABORTED
+    cfg = ConfigManager().load_config()
+    out_dir = _icon_out_dir(args, cfg)
+    ext = ".svg" if args.svg else ".ico"
+    tracker = ChangeTracker()
+    watcher = FolderWatcher() if args.watch else None
+    reported = set()
+
+    def _scan() -> Tuple[List[Tuple[str, str]], Set[str], int]:
+        entries, dirs = expand_inputs(args.inputs, IMAGE_EXTS)
+        entries, conflicts = _split_conflicts(entries, out_dir, ext)
+        for path, owner in conflicts:
+            # 监视模式下每个冲突只报告一次
+            if path not in reported:
+                reported.add(path)
+                reporter.log(f"❌ 输出重名，跳过: {path} (与 {owner} 输出到同一文件)", "error")
+        return entries, dirs, len(conflicts)
+
+    try:
+        entries, dirs, conflicts = _scan()
+        rel_of = dict(entries)
+        # 启动时已存在的文件视为写入完成，不必等待稳定
+        pending = tracker.ready(list(rel_of), settle=False)
+        stats = {}
+        if pending:
+            stats = _convert_icons(args, cfg, [(p, rel_of[p]) for p in pending], reporter)
+            tracker.mark_done(pending)
+        elif not args.watch and not conflicts:
+            reporter.log("⚠️ 没有找到可转换的图片", "warn")
+            return EXIT_ABORTED
+        if not args.watch:
+            return EXIT_FAILED if stats.get("fail") or conflicts else EXIT_OK
+
+        reporter.log(f"👀 开始监视 {len(dirs)} 个目录 ({watcher.backend}，间隔 {args.interval:g} 秒)，Ctrl+C 退出")
+        while True:
+            watcher.watch(dirs)
+            watcher.wait(args.interval)
+            entries, dirs, _ = _scan()
+            rel_of = dict(entries)
+            pending = tracker.ready(list(rel_of))
+            if pending:
+                reporter.log(f"🔄 发现 {len(pending)} 个新增 / 变化的图片")
+                _convert_icons(args, cfg, [(p, rel_of[p]) for p in pending], reporter)
+                tracker.mark_done(pending)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        if watcher is not None:
+            watcher.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="toolbox", description="全能工具箱 命令行模式")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("unpack", help="批量解压文件夹中的压缩包")
+    p.add_argument("source", help="源文件夹")
+    p.add_argument("--mode", choices=sorted(set(OUTPUT_MODES.values())),
+                   help="输出模式 (默认沿用界面上次的选择)")
+    p.add_argument("--dest", help="指定输出目录 (custom_* 模式)")
+    p.add_argument("-p", "--password", action="append", help="指定密码，可重复；指定后不再扫描 txt/nfo")
+    p.add_argument("-w", "--workers", type=int, help="并行解压数 (max_workers)，0 = 按吞吐自适应")
+    p.add_argument("--password-workers", type=int, help="单个压缩包并行试密码数")
+    p.add_argument("--engine", choices=["WinRAR", "Bandizip"], help="外部解压工具类型")
+    p.add_argument("--engine-path", help="外部解压工具路径")
+    p.add_argument("--delete-source", action="store_true", help="解压成功后删除源文件 (含全部分卷)")
+    p.add_argument("--no-index", action="store_true", help="不使用解压索引，全部重新处理")
+    p.add_argument("--no-builtin", action="store_true", help="zip/tar/gz 也交给外部工具")
+    p.add_argument("-r", "--recursive", type=int, nargs="?", const=3, metavar="DEPTH",
+                   help="继续解压压缩包里的压缩包，最多 DEPTH 层 (默认 3)")
+    p.add_argument("--metrics", help="导出逐个压缩包的耗时 / 吞吐记录 (.csv 或 .json)")
+    p.add_argument("--json", action="store_true", help="每行输出一个 JSON 事件")
+    p.add_argument("-q", "--quiet", action="store_true", help="只输出警告、错误与最终结果")
+    p.set_defaults(func=run_unpack)
+
+    p = sub.add_parser("icon", help="批量把图片转换为 ICO / SVG，可持续监视文件夹")
+    p.add_argument("inputs", nargs="+", help="图片文件、文件夹 (含子目录) 或通配符，如 'assets/**/*.png'")
+    p.add_argument("-o", "--out", help="输出目录 (默认沿用界面设置)；输入文件夹的子目录结构会保留")
+    p.add_argument("-s", "--size", default="standard",
+                   help="standard = 256~16 多尺寸 ICO (默认)，或单一尺寸如 128")
+    p.add_argument("--svg", action="store_true", help="输出 SVG (内嵌 PNG) 而不是 ICO")
+    crop = p.add_mutually_exclusive_group()
+    crop.add_argument("--crop", dest="crop", action="store_true", default=None, help="居中裁剪为正方形")
+    crop.add_argument("--no-crop", dest="crop", action="store_false", help="保持原始宽高比")
+    p.add_argument("-w", "--workers", type=int, help="转换进程数，0 = CPU 核数")
+    p.add_argument("--quality", choices=list(ICON_QUALITY), help="ICO 各尺寸的缩放质量")
+    p.add_argument("--no-cache", action="store_true", help="不使用输出缓存，全部重新转换")
+    p.add_argument("--watch", action="store_true", help="转换完成后继续监视，只转换新增 / 变化的图片")
+    p.add_argument("--interval", type=float, default=2.0,
+                   help="监视的轮询间隔秒数 (默认 2；安装 inotify_simple 时变化会立即被发现)")
+    p.add_argument("--json", action="store_true", help="每行输出一个 JSON 事件")
+    p.add_argument("-q", "--quiet", action="store_true", help="只输出警告、错误与最终结果")
+    p.set_defaults(func=run_icon)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_ABORTED if e.code else EXIT_OK
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
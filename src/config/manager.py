@@ -10,13 +10,57 @@ class ConfigManager:
             "engine": "WinRAR",
             "winrar_path": r"C:\Program Files\WinRAR\WinRAR.exe",
             "bandizip_path": r"C:\Program Files\Bandizip\Bandizip.exe",
+            # 并行解压数；0 = 自适应 (按实测吞吐在 1..auto_max_workers 之间自动调整，auto_window 为评估窗口秒数)
             "max_workers": 4,
+            "auto_max_workers": 16,
+            "auto_window": 5.0,
+            # 按物理设备限制并发：机械硬盘 / 固态硬盘各自的同时解压数上限
+            "per_device_limits": True,
+            "hdd_workers": 1,
+            "ssd_workers": 8,
             "last_unpack_src": "",
             "last_unpack_dst": "",
             "last_output_mode": "当前目录(散)",
             "delete_source": False,
+            # 删除源文件时连同全部分卷一起删除
+            "delete_whole_set": True,
+            # 解压索引：跳过已成功且未变化的压缩包
+            "use_index": True,
+            # 先解压到临时目录再原子改名；运行日志用于中断后断点续传
+            "atomic_extract": True,
+            "resume_journal": True,
+            # 解压前检查目标卷剩余空间 (保留 free_space_margin_mb)，放不下的压缩包暂缓；
+            # 解压后大小优先读取清单；读不到时 (如文件名加密) 按压缩包大小 x space_unlisted_ratio 估算，
+            # 估算放不下时不判失败，等没有其他任务在运行再按压缩包本身大小预留后开始
+            "check_free_space": True,
+            "free_space_margin_mb": 512,
+            "space_unlisted_ratio": 4.0,
+            # 嵌套解压：解压出的压缩包直接加入队列继续解压，最多 recursive_depth 层
+            "recursive_unpack": False,
+            "recursive_depth": 3,
+            # zip/tar/gz 优先使用内置解压 (无需启动外部进程)
+            "prefer_builtin": True,
+            # 单个压缩包内并行试密码的线程数 (1 = 顺序尝试)
+            "password_workers": 1,
+            # 记录密码命中统计，下次运行优先尝试
+            "password_stats": True,
+            # 说明文件 (txt/nfo) 并行解析线程数，及每个文件最多读取的字节数 (0 = 不限)
+            "scan_workers": 4,
+            "password_scan_max_bytes": 1048576,
+            # 逐个压缩包耗时 / 吞吐记录的导出路径 (.csv 或 .json，空 = 不导出)
+            "metrics_path": "",
+            # 日志框最多保留的行数 (0 = 不限)
+            "gui_log_max_lines": 5000,
             "icon_output_path": self.paths["icon_out_dir"],
             "icon_auto_crop": True,
+            # 图标转换进程数 (0 = CPU 核数，1 = 单线程)
+            "icon_workers": 0,
+            # ICO 各尺寸逐级缩放的质量：high / medium (大图先整数倍快速缩小) / low
+            "icon_quality": "high",
+            # 图标输出缓存上限 (MB)，按源图内容 + 转换参数命中，未变化的图片直接复制结果 (0 = 关闭)
+            "icon_cache_mb": 256,
+            # 命中缓存时用硬链接代替复制 (节省空间，但修改输出文件会同时改动缓存)
+            "icon_cache_link": False,
             # === 新增 JSON 配置 ===
             "json_work_dir": self.paths["json_dir"]
         }
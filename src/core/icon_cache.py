@@ -0,0 +1,106 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+# 转换算法变化时递增，使旧缓存自然失效
+CACHE_VERSION = 1
+_HASH_BUFSIZE = 1024 * 1024
+
+
+class IconCache:
+    """
+    按内容寻址的图标输出缓存：键 = 源文件字节 + 转换参数 (尺寸、裁剪、质量、输出格式) 的哈希。
+    命中时直接复制 (或硬链接) 缓存的 .ico / .svg，不再解码与编码。
+    多个转换进程可同时读写：写入先落临时文件再原子改名；淘汰由主进程在批次结束后执行。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 0, link: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(fpath: str, params: dict) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps({"v": CACHE_VERSION, **params}, sort_keys=True).encode("utf-8"))
+        with open(fpath, "rb") as f:
+            while True:
+                chunk = f.read(_HASH_BUFSIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        # 按前两位分子目录，避免单个目录文件过多
+        return os.path.join(self.cache_dir, key[:2], f"{key}{ext}")
+
+    def fetch(self, key: str, ext: str, dest: str) -> bool:
+        """命中时把缓存放到 dest 并刷新其最近使用时间"""
+        cached = self._path(key, ext)
+        if not os.path.exists(cached):
+            return False
+        try:
+            if os.path.exists(dest):
+                os.remove(dest)
+            if self.link:
+                try:
+                    os.link(cached, dest)
+                except OSError:
+                    # 跨盘或文件系统不支持硬链接
+                    shutil.copyfile(cached, dest)
+            else:
+                shutil.copyfile(cached, dest)
+            os.utime(cached)
+            return True
+        except OSError:
+            return False
+
+    def store(self, key: str, ext: str, produced: str):
+        """写入临时文件后原子改名，其他进程不会读到写了一半的缓存"""
+        cached = self._path(key, ext)
+        folder = os.path.dirname(cached)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            os.close(fd)
+        except OSError:
+            return
+        try:
+            shutil.copyfile(produced, tmp)
+            os.replace(tmp, cached)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def evict(self) -> int:
+        """总大小超过上限时按最近使用时间从旧到新删除，返回删除的文件数"""
+        if self.max_bytes <= 0:
+            return 0
+        entries = []
+        total = 0
+        for folder, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        return removed
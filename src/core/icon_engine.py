@@ -1,10 +1,147 @@
 import os
 import threading
 import base64  # [新增] 用于编码图片数据
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO  # [新增] 用于内存操作
-from typing import Callable, List
+from typing import Callable, List, Optional, Tuple
 from PIL import Image
 
+from src.core.icon_cache import IconCache
+from src.utils.paths import get_base_roots
+
+
+# 批量 / 命令行模式识别的图片扩展名 (与界面的文件选择框一致)
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+# 缩放质量 -> (重采样算法, 首级缩小的 reducing_gap)。
+# reducing_gap 不为 None 时先用 Image.reduce 整数倍快速缩小，再精确重采样，大图明显更快
+ICON_QUALITY = {
+    "high": (Image.Resampling.LANCZOS, None),
+    "medium": (Image.Resampling.LANCZOS, 3.0),
+    "low": (Image.Resampling.BILINEAR, 2.0),
+}
+
+
+# 解码时保留的分辨率余量：至少为最大输出尺寸的 2 倍，后续再精确缩放，画质不受影响
+_DECODE_GAP = 2
+# Image.reduce 直接支持的模式，其余 (如调色板 P) 先转为 RGBA
+_REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA")
+
+
+def build_pyramid(img: Image.Image, target_sizes: List[Tuple[int, int]], quality: str = "high") -> List[Image.Image]:
+    """
+    由大到小逐级缩放 (256 -> 128 -> 64 -> 48 -> 32 -> 16)，每级以上一级为源，
+    只有第一级需要处理原图，而不是每个尺寸都从原图重采样一次。保持宽高比 (同 thumbnail)。
+    """
+    resample, reducing_gap = ICON_QUALITY.get(quality, ICON_QUALITY["high"])
+    frames = []
+    level = img
+    for size in sorted(set(target_sizes), reverse=True):
+        frame = level.copy()
+        frame.thumbnail(size, resample, reducing_gap=reducing_gap if level is img else None)
+        frames.append(frame)
+        level = frame
+    return frames
+
+
+def convert_one(fpath: str, out_dir: str, is_svg_mode: bool, target_sizes: List[Tuple[int, int]],
+                max_target_dim: int, auto_crop: bool, quality: str = "high",
+                cache_dir: str = "", cache_link: bool = False) -> Tuple[str, str, str]:
+    """
+    转换单个图片 (模块级函数，可在子进程中执行)。
+    cache_dir 非空时先按内容哈希查缓存，命中则直接复制结果，未命中则转换后写入缓存。
+    返回 (结果, 文件名, 说明)，结果为 success / skipped / fail
+    """
+    fname = os.path.basename(fpath)
+    ext = ".svg" if is_svg_mode else ".ico"
+    save_path = os.path.join(out_dir, os.path.splitext(fname)[0] + ext)
+    try:
+        # 只读取文件头，尚未解码像素
+        img = Image.open(fpath)
+        w, h = img.size
+
+        # SVG 模式下通常不检查最小尺寸，或者你可以保留此检查
+        if not is_svg_mode and (w < max_target_dim or h < max_target_dim):
+            return "skipped", fname, f"尺寸 {w}x{h} 小于 {max_target_dim}"
+
+        # 保留子目录结构时各文件的输出目录不同
+        os.makedirs(out_dir, exist_ok=True)
+        cache = key = None
+        if cache_dir:
+            cache = IconCache(cache_dir, link=cache_link)
+            key = cache.make_key(fpath, {"svg": is_svg_mode, "sizes": sorted(target_sizes),
+                                         "crop": auto_crop, "quality": quality})
+            if cache.fetch(key, ext, save_path):
+                img.close()
+                return "success", fname, "缓存"
+
+        # 输出最大只有 max_target_dim，不必按原图分辨率解码 (SVG 保留原图分辨率，不缩小)
+        factor = 1
+        if not is_svg_mode:
+            need = max_target_dim * _DECODE_GAP
+            # 裁剪时短边决定输出，不裁剪时 (thumbnail) 长边决定输出
+            ref = min(w, h) if auto_crop else max(w, h)
+            if ref > need:
+                if img.format == "JPEG":
+                    # JPEG 在解码阶段按 1/2 ~ 1/8 缩小 (DCT 缩放)，内存与耗时同比下降
+                    img.draft(img.mode, (-(-w * need // ref), -(-h * need // ref)))
+                else:
+                    factor = int(min(img.size) // need) if auto_crop else int(max(img.size) // need)
+
+        # 自动裁剪逻辑 (SVG 模式也生效)：先裁剪再转换颜色模式，只处理需要的像素
+        if auto_crop:
+            cw, ch = img.size
+            m = min(cw, ch)
+            left, top = (cw - m) // 2, (ch - m) // 2
+            img = img.crop((left, top, left + m, top + m))
+
+        if factor >= 2:
+            if img.mode not in _REDUCIBLE_MODES:
+                img = img.convert("RGBA")
+            # 整数倍快速缩小 (盒式滤波)，之后的逐级缩放在小图上进行
+            img = img.reduce(factor)
+
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+
+        # === [修改] 分支处理：保存为 SVG 或 ICO ===
+        if is_svg_mode:
+            save_as_svg(img, save_path)
+        else:
+            frames = build_pyramid(img, target_sizes, quality)
+            # 直接提供各尺寸的帧，Pillow 不再逐个从原图缩放
+            frames[0].save(save_path, format='ICO', sizes=[f.size for f in frames], append_images=frames[1:])
+        if cache is not None:
+            cache.store(key, ext, save_path)
+        return "success", fname, ""
+    except Exception as e:
+        return "fail", fname, str(e)
+
+
+def save_as_svg(img: Image.Image, path: str):
+    """将 PIL Image 封装为 SVG 文件"""
+    # 1. 将图片转换为 PNG 字节流
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+
+    # 2. 转为 Base64 字符串
+    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+    # 3. 构造 SVG XML 内容
+    w, h = img.size
+    svg_content = (
+        f'<svg width="{w}" height="{h}" version="1.1" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+        f'  <image width="{w}" height="{h}" xlink:href="data:image/png;base64,{img_str}"/>\n'
+        f'</svg>'
+    )
+
+    # 4. 写入文件
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(svg_content)
+
 
 class IconEngine:
     def __init__(self, log_cb: Callable, prog_cb: Callable, fin_cb: Callable):
@@ -12,11 +149,18 @@ class IconEngine:
         self.prog = prog_cb
         self.fin = fin_cb
 
-    def start(self, files: List[str], out_dir: str, size_mode: str, custom_size: str, auto_crop: bool):
-        threading.Thread(target=self._run, args=(files, out_dir, size_mode, custom_size, auto_crop),
+    def start(self, files: List[str], out_dir: str, size_mode: str, custom_size: str, auto_crop: bool,
+              workers: int = 1, quality: str = "high", cache_mb: int = 0, cache_link: bool = False,
+              rel_dirs: Optional[List[str]] = None):
+        threading.Thread(target=self._run,
+                         args=(files, out_dir, size_mode, custom_size, auto_crop, workers, quality,
+                               cache_mb, cache_link, rel_dirs),
                          daemon=True).start()
 
-    def _run(self, files: List[str], out_dir: str, size_mode: str, custom_size: str, auto_crop: bool):
+    def _run(self, files: List[str], out_dir: str, size_mode: str, custom_size: str, auto_crop: bool,
+             workers: int = 1, quality: str = "high", cache_mb: int = 0, cache_link: bool = False,
+             rel_dirs: Optional[List[str]] = None):
+        """rel_dirs: 与 files 一一对应的输出子目录 (相对 out_dir)，用于保留输入的目录结构"""
         # === [新增] 判断是否为 SVG 模式 ===
         is_svg_mode = "SVG" in size_mode.upper()
 
@@ -51,69 +195,78 @@ class IconEngine:
             except OSError:
                 pass
 
+        # cache_mb: 输出缓存上限 (MB)，0 = 不使用缓存
+        cache = None
+        if cache_mb > 0:
+            try:
+                cache = IconCache(os.path.join(get_base_roots()["config_dir"], "icon_cache"),
+                                  cache_mb * 1024 * 1024, cache_link)
+            except OSError as e:
+                self.log(f"⚠️ 无法创建图标缓存目录，本次不使用缓存 ({e})", "warn")
+
         stats = {"success": 0, "fail": 0, "skipped": []}
         total = len(files)
+        rel_dirs = rel_dirs or [""] * total
+        out_dirs = [os.path.join(out_dir, rel) if rel else out_dir for rel in rel_dirs]
+        # 子进程中按目录重新打开缓存，只传可序列化的参数
+        convert = partial(convert_one, is_svg_mode=is_svg_mode, target_sizes=target_sizes,
+                          max_target_dim=max_target_dim, auto_crop=auto_crop, quality=quality,
+                          cache_dir=cache.cache_dir if cache else "", cache_link=cache_link)
+        hits = 0
 
-        for i, fpath in enumerate(files):
-            fname = os.path.basename(fpath)
-            try:
-                img = Image.open(fpath)
-                w, h = img.size
-
-                # SVG 模式下通常不检查最小尺寸，或者你可以保留此检查
-                if not is_svg_mode and (w < max_target_dim or h < max_target_dim):
-                    stats["skipped"].append(f"{fname} (尺寸 {w}x{h} 小于 {max_target_dim})")
-                    self.log(f"⚠️ 跳过: {fname} (尺寸不足)", "warn")
-                    self.prog((i + 1) / total)
-                    continue
-
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-
-                # 自动裁剪逻辑 (SVG 模式也生效)
-                if auto_crop:
-                    w, h = img.size
-                    m = min(w, h)
-                    img = img.crop(((w - m) / 2, (h - m) / 2, (w + m) / 2, (h + m) / 2))
-
-                name_no_ext = os.path.splitext(fname)[0]
-
-                # === [修改] 分支处理：保存为 SVG 或 ICO ===
-                if is_svg_mode:
-                    save_path = os.path.join(out_dir, f"{name_no_ext}.svg")
-                    self._save_as_svg(img, save_path)
-                else:
-                    save_path = os.path.join(out_dir, f"{name_no_ext}.ico")
-                    img.save(save_path, format='ICO', sizes=target_sizes)
-
+        # workers: 1 = 当前线程逐个转换，0 = 按 CPU 核数，>1 = 多进程 (缩放 / 编码是 CPU 密集型，线程受 GIL 限制)
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        workers = min(workers, total)
+        for i, (status, fname, detail) in enumerate(self._convert_all(files, out_dirs, convert, workers)):
+            if rel_dirs[i]:
+                fname = os.path.join(rel_dirs[i], fname)
+            if status == "success":
                 stats["success"] += 1
-                self.log(f"✅: {fname}", "success")
-            except Exception as e:
+                if detail:
+                    hits += 1
+                    self.log(f"✅: {fname} ({detail})", "success")
+                else:
+                    self.log(f"✅: {fname}", "success")
+            elif status == "skipped":
+                stats["skipped"].append(f"{fname} ({detail})")
+                self.log(f"⚠️ 跳过: {fname} (尺寸不足)", "warn")
+            else:
                 stats["fail"] += 1
-                self.log(f"❌: {fname} ({str(e)})", "error")
-
+                self.log(f"❌: {fname} ({detail})", "error")
             self.prog((i + 1) / total)
 
+        if cache is not None:
+            if hits:
+                self.log(f"♻️ {hits} 个图片未变化，直接使用缓存", "info")
+            # 淘汰只在主进程批次结束后进行，避免与子进程的读写冲突
+            cache.evict()
         self.fin(stats)
 
+    def _convert_all(self, files: List[str], out_dirs: List[str], convert: Callable, workers: int):
+        """按输入顺序逐个产出转换结果；多进程模式下分块派发，结果仍按顺序返回以便汇报进度"""
+        if workers <= 1:
+            for fpath, out_dir in zip(files, out_dirs):
+                yield convert(fpath, out_dir)
+            return
+        # 每块若干文件，减少进程间通信次数；块不宜过大，否则进度更新不均匀
+        chunksize = max(1, min(16, len(files) // (workers * 4)))
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, ValueError, NotImplementedError) as e:
+            self.log(f"⚠️ 无法启动多进程，改为单线程转换 ({e})", "warn")
+            yield from self._convert_all(files, out_dirs, convert, 1)
+            return
+        done = 0
+        try:
+            with pool:
+                for result in pool.map(convert, files, out_dirs, chunksize=chunksize):
+                    done += 1
+                    yield result
+        except BrokenProcessPool as e:
+            # 子进程异常退出 (如内存不足被杀)：剩余文件在当前进程继续转换
+            self.log(f"⚠️ 转换进程异常退出，剩余 {len(files) - done} 个改为单线程转换 ({e})", "warn")
+            yield from self._convert_all(files[done:], out_dirs[done:], convert, 1)
+
     # === [新增] SVG 保存辅助函数 ===
     def _save_as_svg(self, img: Image.Image, path: str):
-        """将 PIL Image 封装为 SVG 文件"""
-        # 1. 将图片转换为 PNG 字节流
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-
-        # 2. 转为 Base64 字符串
-        img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-        # 3. 构造 SVG XML 内容
-        w, h = img.size
-        svg_content = (
-            f'<svg width="{w}" height="{h}" version="1.1" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
-            f'  <image width="{w}" height="{h}" xlink:href="data:image/png;base64,{img_str}"/>\n'
-            f'</svg>'
-        )
-
-        # 4. 写入文件
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(svg_content)
\ No newline at end of file
+        save_as_svg(img, path)
\ No newline at end of file
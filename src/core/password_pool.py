@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class PasswordPool:
+    """
+    线程安全的候选密码池。
+    排序规则：手动输入 > 历史命中次数 > 最近命中时间 > 与压缩包的目录距离 > 发现顺序。
+    命中统计可持久化到 JSON，下次运行时已验证过的密码会排在前面。
+    """
+
+    def __init__(self, stats_file: Optional[str] = None):
+        self._lock = threading.Lock()
+        # pwd -> {"order", "manual", "sources"}
+        self._entries: Dict[str, dict] = {}
+        # pwd -> {"hits", "last_hit"} (跨运行保留)
+        self._stats: Dict[str, dict] = {}
+        self._stats_file = stats_file
+        self._load_stats()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, pwd: str) -> bool:
+        with self._lock:
+            return pwd in self._entries
+
+    def add(self, pwd: str, source_dir: Optional[str] = None, manual: bool = False):
+        with self._lock:
+            entry = self._entries.get(pwd)
+            if entry is None:
+                entry = {"order": len(self._entries), "manual": manual, "sources": set()}
+                self._entries[pwd] = entry
+            entry["manual"] = entry["manual"] or manual
+            if source_dir:
+                entry["sources"].add(os.path.normcase(os.path.abspath(source_dir)))
+
+    def ranked(self, archive_dir: Optional[str] = None) -> List[str]:
+        """按优先级返回候选密码快照"""
+        target = os.path.normcase(os.path.abspath(archive_dir)) if archive_dir else None
+        with self._lock:
+            items = [(pwd, entry, self._stats.get(pwd)) for pwd, entry in self._entries.items()]
+
+        def _key(item):
+            pwd, entry, st = item
+            hits = st["hits"] if st else 0
+            last_hit = st["last_hit"] if st else 0.0
+            dist = min((_dir_distance(target, s) for s in entry["sources"]), default=1 << 16) \
+                if target else 0
+            return not entry["manual"], -hits, -last_hit, dist, entry["order"]
+
+        return [pwd for pwd, _, _ in sorted(items, key=_key)]
+
+    def scoped(self, archive_dir: str) -> Tuple[List[str], List[str]]:
+        """
+        按作用域拆分候选密码 (各自保持 ranked 顺序)：
+        - 本地：手动输入、历史命中过的，以及来自压缩包所在目录或其上级目录说明文件的密码
+        - 全局：其余目录中发现的密码，仅在本地候选全部失败后再尝试
+        """
+        target = os.path.normcase(os.path.abspath(archive_dir))
+        ranked = self.ranked(archive_dir)
+        with self._lock:
+            local_set = {pwd for pwd, entry in self._entries.items()
+                         if entry["manual"] or pwd in self._stats
+                         or any(target == s or target.startswith(s.rstrip(os.sep) + os.sep)
+                                for s in entry["sources"])}
+        local = [p for p in ranked if p in local_set]
+        fallback = [p for p in ranked if p not in local_set]
+        return local, fallback
+
+    def is_proven(self, pwd: str) -> bool:
+        """是否曾经解开过压缩包 (本次或历史运行)"""
+        with self._lock:
+            st = self._stats.get(pwd)
+            return bool(st and st["hits"])
+
+    def record_hit(self, pwd: str):
+        if not pwd:
+            return
+        with self._lock:
+            st = self._stats.setdefault(pwd, {"hits": 0, "last_hit": 0.0})
+            st["hits"] += 1
+            st["last_hit"] = time.time()
+
+    def _load_stats(self):
+        if not self._stats_file or not os.path.exists(self._stats_file):
+            return
+        try:
+            with open(self._stats_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._stats = {k: {"hits": int(v.get("hits", 0)), "last_hit": float(v.get("last_hit", 0.0))}
+                               for k, v in data.items() if isinstance(v, dict)}
+        except (json.JSONDecodeError, IOError, ValueError, TypeError):
+            self._stats = {}
+
+    def save_stats(self):
+        if not self._stats_file:
+            return
+        with self._lock:
+            data = dict(self._stats)
+        try:
+            tmp = self._stats_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp, self._stats_file)
+        except (IOError, OSError) as e:
+            print(f"Error saving password stats: {e}")
+
+
+def _dir_distance(target: str, source: str) -> int:
+    """两个目录在树上的距离：向上到公共祖先的层数 + 向下的层数"""
+    try:
+        common = os.path.commonpath([target, source])
+    except ValueError:
+        # 不同盘符
+        return 1 << 16
+    up = len(os.path.relpath(target, common).split(os.sep)) if target != common else 0
+    down = len(os.path.relpath(source, common).split(os.sep)) if source != common else 0
+    return up + down
@@ -0,0 +1,183 @@
+import os
+import sys
+import signal
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import List, Optional, Set, Tuple
+
+
+class ExtractCancelled(Exception):
+    """任务在解压过程中被停止"""
+
+
+class AttemptGroup:
+    """
+    一组可单独取消的尝试 (如同一压缩包的并行试密码)。
+    线程在 bind() 内启动的外部进程归入本组；cancel() 立即结束组内仍在运行的进程，
+    之后组内的新尝试与内置解压的 checkpoint() 都直接抛出 ExtractCancelled，不影响组外的任务。
+    """
+
+    def __init__(self, control: "ProcessControl"):
+        self._control = control
+        self._procs: Set[subprocess.Popen] = set()
+        self.cancelled = False
+
+    @contextmanager
+    def bind(self):
+        local = self._control._local
+        prev = getattr(local, "group", None)
+        local.group = self
+        try:
+            yield self
+        finally:
+            local.group = prev
+
+    def cancel(self):
+        with self._control._lock:
+            self.cancelled = True
+            procs = list(self._procs)
+        for proc in procs:
+            _kill(proc)
+
+
+class ProcessControl:
+    """
+    解压任务的停止 / 暂停控制。
+    - 登记运行中的外部解压进程：停止时立即结束，暂停时挂起 (POSIX: 对整个进程组发 SIGSTOP / SIGCONT，
+      Windows: NtSuspendProcess / NtResumeProcess)，而不是等当前压缩包解压完
+    - 内置解压在每次读取数据块前调用 checkpoint()，同样能在大文件中途暂停 / 停止
+    """
+
+    def __init__(self, stop_event: threading.Event, pause_event: threading.Event):
+        self._stop_event = stop_event
+        self._pause_event = pause_event
+        self._lock = threading.Lock()
+        self._procs: Set[subprocess.Popen] = set()
+        self._suspended = False
+        # 当前线程所属的尝试组 (AttemptGroup.bind)
+        self._local = threading.local()
+
+    def new_group(self) -> AttemptGroup:
+        return AttemptGroup(self)
+
+    def _group(self) -> Optional[AttemptGroup]:
+        return getattr(self._local, "group", None)
+
+    def checkpoint(self):
+        """暂停时阻塞，停止 (或所属尝试组被取消) 时抛出 ExtractCancelled"""
+        self._pause_event.wait()
+        group = self._group()
+        if self._stop_event.is_set() or (group is not None and group.cancelled):
+            raise ExtractCancelled()
+
+    def run(self, cmd: List[str], **kwargs) -> int:
+        """启动并登记外部进程，等待其结束并返回退出码；被停止时抛出 ExtractCancelled"""
+        return self._run(cmd, False, None, **kwargs)[0]
+
+    def output(self, cmd: List[str], timeout: Optional[float] = None, **kwargs) -> Tuple[Optional[int], bytes]:
+        """
+        同 run，但收集标准输出 (用于列出清单)，返回 (退出码, 输出)；
+        超过 timeout 秒时结束进程，退出码为 None
+        """
+        return self._run(cmd, True, timeout, **kwargs)
+
+    def _run(self, cmd: List[str], capture: bool, timeout: Optional[float], **kwargs) -> Tuple[Optional[int], bytes]:
+        self.checkpoint()
+        # 不收集的输出直接丢弃，避免管道写满导致子进程阻塞
+        if sys.platform != "win32":
+            # 独立进程组：结束 / 挂起时连同包装脚本启动的孙进程一起处理
+            kwargs.setdefault("start_new_session", True)
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, **kwargs)
+        group = self._group()
+        with self._lock:
+            self._procs.add(proc)
+            if group is not None:
+                group._procs.add(proc)
+            # 登记前恰好按下了停止 / 暂停，或所属尝试组已取消
+            if self._stop_event.is_set() or (group is not None and group.cancelled):
+                _kill(proc)
+            elif self._suspended:
+                _suspend(proc)
+        try:
+            try:
+                out, _ = proc.communicate(timeout=timeout)
+                code = proc.returncode
+            except subprocess.TimeoutExpired:
+                _kill(proc)
+                proc.communicate()
+                out, code = b"", None
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+                if group is not None:
+                    group._procs.discard(proc)
+        if self._stop_event.is_set() or (group is not None and group.cancelled):
+            raise ExtractCancelled()
+        return code, out or b""
+
+    def kill_all(self):
+        with self._lock:
+            self._suspended = False
+            for proc in self._procs:
+                _kill(proc)
+
+    def suspend_all(self):
+        with self._lock:
+            self._suspended = True
+            for proc in self._procs:
+                _suspend(proc)
+
+    def resume_all(self):
+        with self._lock:
+            self._suspended = False
+            for proc in self._procs:
+                _resume(proc)
+
+
+def _signal_group(proc: subprocess.Popen, sig: int):
+    """向子进程所在的进程组发信号 (子进程以 start_new_session 启动，组号即其 pid)"""
+    try:
+        os.killpg(proc.pid, sig)
+    except OSError:
+        # 进程组内已没有进程
+        pass
+
+
+def _kill(proc: subprocess.Popen):
+    if sys.platform == "win32":
+        try:
+            proc.kill()
+        except OSError:
+            pass
+        return
+    # POSIX 下 SIGKILL 对已挂起 (SIGSTOP) 的进程同样立即生效
+    _signal_group(proc, signal.SIGKILL)
+
+
+def _nt_call(func_name: str, proc: subprocess.Popen):
+    import ctypes
+    try:
+        getattr(ctypes.windll.ntdll, func_name)(int(proc._handle))
+    except (AttributeError, OSError):
+        pass
+
+
+def _suspend(proc: subprocess.Popen):
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        _nt_call("NtSuspendProcess", proc)
+        return
+    _signal_group(proc, signal.SIGSTOP)
+
+
+def _resume(proc: subprocess.Popen):
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        _nt_call("NtResumeProcess", proc)
+        return
+    _signal_group(proc, signal.SIGCONT)
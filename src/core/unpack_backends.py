@@ -0,0 +1,486 @@
+import io
+import os
+import sys
+import gzip
+import struct
+import shutil
+import tarfile
+import zipfile
+import threading
+import subprocess
+from typing import BinaryIO, Dict, List, Optional
+from src.core.process_control import ExtractCancelled, ProcessControl
+from src.core.volumes import ConcatReader, split_volume_parts
+
+# 流式解压的读写缓冲区 (1 MiB)，减少大文件的系统调用次数
+COPY_BUFSIZE = 1024 * 1024
+
+# 列出清单 (只读文件头) 的超时秒数
+LIST_TIMEOUT = 60
+
+# zipfile 可直接处理的压缩算法 (AES 加密 = 99、Deflate64 = 9 等需交给外部工具)
+_ZIP_SUPPORTED_METHODS = {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}
+# zip 末尾的目录结束记录 (EOCD) 与 zip64 EOCD 定位记录
+_ZIP_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+
+
+def _safe_join(dest: str, member: str) -> Optional[str]:
+    """拼接解压目标路径，拒绝绝对路径与 ../ 越界 (Zip Slip)"""
+    member = member.replace("\\", "/").lstrip("/")
+    target = os.path.realpath(os.path.join(dest, *[p for p in member.split("/") if p not in ("", ".")]))
+    root = os.path.realpath(dest)
+    if target != root and not target.startswith(root + os.sep):
+        return None
+    return target
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    """未设置 UTF-8 标志的文件名按 cp437 解码，国内压缩包实际多为 GBK，这里还原"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("gbk")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _is_spanned_zip(fpath: str, fh: BinaryIO) -> bool:
+    """
+    跨卷 zip (zip -s / WinZip 分卷: name.z01, name.z02 ... name.zip)：zipfile 能读出末卷里的中央目录，
+    但成员数据在其他卷中，无法解压，需交给外部工具。按同名 .z01 或 EOCD 中的卷号判断
+    """
+    if fpath.lower().endswith(".zip"):
+        stem = fpath[:-4]
+        if os.path.exists(stem + ".z01") or os.path.exists(stem + ".Z01"):
+            return True
+    size = fh.seek(0, io.SEEK_END)
+    # EOCD 固定 22 字节 + 最长 65535 字节注释，前面可能还有 20 字节的 zip64 定位记录
+    tail_len = min(size, 22 + 65535 + 20)
+    fh.seek(size - tail_len)
+    tail = fh.read(tail_len)
+    pos = tail.rfind(_ZIP_EOCD_SIG)
+    if pos < 0 or pos + 22 > len(tail):
+        return False
+    disk, cd_disk = struct.unpack("<HH", tail[pos + 4:pos + 8])
+    if 0xFFFF in (disk, cd_disk):
+        # zip64：卷数记录在定位记录中
+        loc = pos - 20
+        if loc >= 0 and tail[loc:loc + 4] == _ZIP64_LOCATOR_SIG:
+            return struct.unpack("<I", tail[loc + 16:loc + 20])[0] > 1
+        return False
+    return disk != 0 or cd_disk != 0
+
+
+def _parse_listing(text: str, style: str) -> List[dict]:
+    """
+    解析技术清单为条目列表 [{"name", "size", "dir", "encrypted"}]。
+    rar lt: 每个条目以 "Name: ..." 开头，"Service: ..." 为注释等附加块 (忽略)，加密条目的 Flags 含 encrypted；
+    7z l -slt: "----------" 之后每个条目以 "Path = ..." 开头，含 "Size = N"、"Folder = +"、"Encrypted = +"
+    """
+    entries: List[dict] = []
+    cur = None
+    started = style == "rar"
+    sep = ": " if style == "rar" else " = "
+    for line in text.splitlines():
+        if not started:
+            started = line.startswith("----------")
+            continue
+        key, found, value = line.strip().partition(sep)
+        if not found:
+            continue
+        if key in ("Name", "Path"):
+            cur = {"name": value, "size": 0, "dir": False, "encrypted": False}
+            entries.append(cur)
+        elif key == "Service":
+            cur = None
+        elif cur is None:
+            continue
+        elif key == "Size" and value.isdigit():
+            cur["size"] = int(value)
+        elif key == "Type":
+            # rar: File / Directory；7z 的 Type 只出现在归档头部，不会走到这里
+            cur["dir"] = value == "Directory"
+        elif key == "Folder":
+            cur["dir"] = value == "+"
+        elif key == "Flags":
+            cur["encrypted"] = "encrypted" in value.lower()
+        elif key == "Encrypted":
+            cur["encrypted"] = value == "+"
+    return entries
+
+
+class _CheckedReader(io.RawIOBase):
+    """每次读取前检查暂停 / 停止，使内置解压在大文件中途也能及时响应"""
+
+    def __init__(self, raw: io.RawIOBase, control: ProcessControl):
+        super().__init__()
+        self._raw = raw
+        self._control = control
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._raw.seek(offset, whence)
+
+    def readinto(self, b) -> int:
+        self._control.checkpoint()
+        return self._raw.readinto(b)
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+class ExtractBackend:
+    """解压后端基类"""
+    name = "base"
+
+    def __init__(self, control: Optional[ProcessControl] = None):
+        self.control = control
+
+    def supports(self, fpath: str) -> bool:
+        raise NotImplementedError
+
+    def is_encrypted(self, fpath: str) -> Optional[bool]:
+        """是否需要密码；无法廉价判断时返回 None"""
+        return None
+
+    def test_password(self, fpath: str, pwd: str) -> bool:
+        """只校验密码，不落盘解压"""
+        raise NotImplementedError
+
+    def uncompressed_size(self, fpath: str) -> Optional[int]:
+        """解压后的总大小 (字节)；无法廉价读取时返回 None"""
+        return None
+
+    def extract(self, fpath: str, dest: str, pwd: str) -> bool:
+        raise NotImplementedError
+
+
+class BuiltinBackend(ExtractBackend):
+    """
+    进程内解压 (zipfile / tarfile / gzip)。
+    免去每次尝试密码都启动外部进程的开销，且可在 Linux 上运行。
+    按字节切分的分卷 (name.zip.001 / name.tar.001 ...) 会被拼接后直接读取。
+    """
+    name = "builtin"
+
+    @staticmethod
+    def _kind(fpath: str) -> str:
+        name_lower = fpath.lower()
+        if name_lower.endswith(".001"):
+            name_lower = name_lower[:-4]
+        if name_lower.endswith(".zip"):
+            return "zip"
+        if name_lower.endswith((".tar", ".tar.gz", ".tgz")):
+            return "tar"
+        if name_lower.endswith(".gz"):
+            return "gz"
+        return ""
+
+    def _open_source(self, fpath: str) -> BinaryIO:
+        if fpath.lower().endswith(".001"):
+            raw = ConcatReader(split_volume_parts(fpath))
+        else:
+            raw = io.FileIO(fpath, "rb")
+        if self.control:
+            raw = _CheckedReader(raw, self.control)
+        return io.BufferedReader(raw, COPY_BUFSIZE)
+
+    def supports(self, fpath: str) -> bool:
+        kind = self._kind(fpath)
+        try:
+            if kind == "zip":
+                with self._open_source(fpath) as fh:
+                    if _is_spanned_zip(fpath, fh):
+                        return False
+                    with zipfile.ZipFile(fh) as zf:
+                        return all(i.compress_type in _ZIP_SUPPORTED_METHODS for i in zf.infolist())
+            if kind == "tar" and fpath.lower().endswith((".tar", ".tar.001")):
+                with self._open_source(fpath) as fh:
+                    return tarfile.is_tarfile(fh)
+            return kind in ("tar", "gz")
+        except (OSError, zipfile.BadZipFile, tarfile.TarError):
+            return False
+
+    def is_encrypted(self, fpath: str) -> Optional[bool]:
+        # tar / gz 不支持加密
+        if self._kind(fpath) != "zip":
+            return False
+        try:
+            with self._open_source(fpath) as fh, zipfile.ZipFile(fh) as zf:
+                return any(i.flag_bits & 0x1 for i in zf.infolist())
+        except (OSError, zipfile.BadZipFile):
+            return None
+
+    def test_password(self, fpath: str, pwd: str) -> bool:
+        if self._kind(fpath) != "zip":
+            return True
+        pwd_bytes = pwd.encode("utf-8") if pwd else None
+        try:
+            with self._open_source(fpath) as fh, zipfile.ZipFile(fh) as zf:
+                encrypted = [i for i in zf.infolist() if i.flag_bits & 0x1 and not i.is_dir()]
+                if not encrypted:
+                    return True
+                # 取最小的加密成员：打开时先做校验字节检查 (错误密码绝大多数在此立即失败)，
+                # 读完后再做 CRC 校验，代价远小于完整解压
+                info = min(encrypted, key=lambda i: i.file_size)
+                with zf.open(info, pwd=pwd_bytes) as src:
+                    while src.read(COPY_BUFSIZE):
+                        pass
+            return True
+        except Exception:
+            return False
+
+    def uncompressed_size(self, fpath: str) -> Optional[int]:
+        kind = self._kind(fpath)
+        try:
+            with self._open_source(fpath) as fh:
+                if kind == "zip":
+                    # 只读中央目录
+                    with zipfile.ZipFile(fh) as zf:
+                        return sum(i.file_size for i in zf.infolist())
+                size = fh.seek(0, io.SEEK_END)
+                if kind == "tar" and fpath.lower().endswith((".tar", ".tar.001")):
+                    # 未压缩的 tar：内容总量不超过文件本身
+                    return size
+                if size < 18:
+                    return None
+                # gzip 末尾 4 字节 ISIZE = 原始大小 mod 2^32；压缩包本身超过 4 GiB 时按其大小补回高位
+                # (小于 4 GiB 但解压后超过 4 GiB 的无法识别，只能低估)
+                fh.seek(-4, io.SEEK_END)
+                isize = struct.unpack("<I", fh.read(4))[0]
+                if size >= 1 << 32:
+                    while isize < size:
+                        isize += 1 << 32
+                return isize
+        except (OSError, zipfile.BadZipFile, struct.error):
+            return None
+
+    def extract(self, fpath: str, dest: str, pwd: str) -> bool:
+        kind = self._kind(fpath)
+        try:
+            with self._open_source(fpath) as fh:
+                if kind == "zip":
+                    return self._extract_zip(fh, dest, pwd)
+                if kind == "tar" or tarfile.is_tarfile(fh):
+                    fh.seek(0)
+                    return self._extract_tar(fh, dest)
+                fh.seek(0)
+                return self._extract_gz(fh, fpath, dest)
+        except Exception:
+            return False
+
+    def _extract_zip(self, fh: BinaryIO, dest: str, pwd: str) -> bool:
+        pwd_bytes = pwd.encode("utf-8") if pwd else None
+        with zipfile.ZipFile(fh) as zf:
+            for info in zf.infolist():
+                target = _safe_join(dest, _zip_member_name(info))
+                if target is None:
+                    continue
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                # 先打开成员 (密码错误会在此处立即抛出)，再创建输出文件
+                with zf.open(info, pwd=pwd_bytes) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFSIZE)
+        return True
+
+    def _extract_tar(self, fh: BinaryIO, dest: str) -> bool:
+        with tarfile.open(fileobj=fh, mode="r:*", copybufsize=COPY_BUFSIZE) as tf:
+            if hasattr(tarfile, "data_filter"):
+                tf.extractall(dest, filter="data")
+            else:
+                members = [m for m in tf.getmembers()
+                           if (m.isfile() or m.isdir()) and _safe_join(dest, m.name) is not None]
+                tf.extractall(dest, members=members)
+        return True
+
+    def _extract_gz(self, fh: BinaryIO, fpath: str, dest: str) -> bool:
+        out_name = os.path.basename(fpath)
+        if out_name.lower().endswith(".001"):
+            out_name = out_name[:-4]
+        if out_name.lower().endswith(".gz"):
+            out_name = out_name[:-3]
+        with gzip.GzipFile(fileobj=fh, mode="rb") as src, open(os.path.join(dest, out_name), "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFSIZE)
+        return True
+
+
+class ExternalBackend(ExtractBackend):
+    """调用 WinRAR / Bandizip 命令行解压，处理 rar / 7z / 分卷等内置后端不支持的格式"""
+    name = "external"
+
+    def __init__(self, engine: str, engine_path: str, control: Optional[ProcessControl] = None):
+        super().__init__(control)
+        self.engine = engine
+        self.engine_path = engine_path
+        # 压缩包 -> 清单条目 (None = 无法列出)；估算空间、判断加密、选测试条目共用一次列表
+        self._listings: Dict[str, Optional[List[dict]]] = {}
+        self._listing_lock = threading.Lock()
+        self._tools = None
+
+    def supports(self, fpath: str) -> bool:
+        return bool(self.engine_path)
+
+    def _build_cmd(self, fpath: str, dest: str, pwd: str) -> List[str]:
+        cmd = [self.engine_path, "x", "-y"]
+        if "WinRAR" in self.engine:
+            # WinRAR 只要给第一个分卷，它会自动处理后续的
+            cmd.extend(["-ibck", fpath, dest + os.sep, f"-p{pwd}" if pwd else "-p-"])
+        else:
+            # Bandizip 逻辑类似
+            cmd.extend([f"-o:{dest}", fpath])
+            if pwd:
+                cmd.append(f"-p:{pwd}")
+        return cmd
+
+    def _build_test_cmd(self, fpath: str, pwd: str) -> List[str]:
+        # t = 测试模式：只解码校验，不写出文件
+        if "WinRAR" in self.engine:
+            cmd = [self.engine_path, "t", "-y", "-ibck", f"-p{pwd}" if pwd else "-p-", fpath]
+            # 清单可用时只测试最小的加密条目，而不是完整解码整个压缩包
+            member = self._smallest_encrypted(fpath)
+            if member:
+                cmd.append(member)
+            return cmd
+        cmd = [self.engine_path, "t", "-y", fpath]
+        if pwd:
+            cmd.append(f"-p:{pwd}")
+        return cmd
+
+    def _run(self, cmd: List[str]) -> bool:
+        try:
+            if self.control:
+                # 登记为受控进程：停止时立即结束，暂停时挂起
+                return self.control.run(cmd, **_popen_kwargs()) == 0
+            return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  **_popen_kwargs()).returncode == 0
+        except ExtractCancelled:
+            return False
+        except Exception:
+            return False
+
+    def test_password(self, fpath: str, pwd: str) -> bool:
+        return self._run(self._build_test_cmd(fpath, pwd))
+
+    def _list_tools(self) -> List[tuple]:
+        """
+        能把清单输出到标准输出的命令行工具 [(路径, 风格)]。
+        WinRAR.exe / Bandizip.exe 是图形程序，列表不走标准输出：改用同目录的 Rar.exe / UnRAR.exe，
+        或系统中的 7-Zip
+        """
+        if self._tools is not None:
+            return self._tools
+        tools = []
+        folder = os.path.dirname(self.engine_path)
+        stem = os.path.splitext(os.path.basename(self.engine_path))[0].lower()
+        if stem in ("rar", "unrar"):
+            tools.append((self.engine_path, "rar"))
+        for name in ("Rar.exe", "UnRAR.exe", "rar", "unrar"):
+            path = os.path.join(folder, name) if folder else ""
+            if path and os.path.isfile(path) and path != self.engine_path:
+                tools.append((path, "rar"))
+                break
+        for name in ("7z", "7zz", "7za"):
+            path = shutil.which(name)
+            if path:
+                tools.append((path, "7z"))
+                break
+        else:
+            if sys.platform == "win32":
+                for base in (os.environ.get("ProgramFiles", ""), os.environ.get("ProgramFiles(x86)", "")):
+                    path = os.path.join(base, "7-Zip", "7z.exe")
+                    if base and os.path.isfile(path):
+                        tools.append((path, "7z"))
+                        break
+        self._tools = tools
+        return tools
+
+    def _listing(self, fpath: str) -> Optional[List[dict]]:
+        """用命令行工具列出清单 (每个压缩包只列一次)；文件名也加密或没有可用工具时返回 None"""
+        with self._listing_lock:
+            if fpath in self._listings:
+                return self._listings[fpath]
+        entries = None
+        for tool, style in self._list_tools():
+            if style == "rar":
+                # -p- : 文件名加密的压缩包不提示输入密码，直接失败
+                cmd = [tool, "lt", "-p-", fpath]
+            else:
+                # 给一个占位密码，避免 7z 交互式询问；只加密内容的压缩包仍可列出清单
+                cmd = [tool, "l", "-slt", "-p-", fpath]
+            try:
+                if self.control:
+                    # 受控进程：停止时与解压进程一起结束
+                    code, out = self.control.output(cmd, LIST_TIMEOUT, **_popen_kwargs())
+                else:
+                    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                          stderr=subprocess.DEVNULL, timeout=LIST_TIMEOUT, **_popen_kwargs())
+                    code, out = proc.returncode, proc.stdout
+            except ExtractCancelled:
+                return None
+            except (OSError, subprocess.SubprocessError):
+                continue
+            if code == 0:
+                entries = _parse_listing(out.decode("utf-8", errors="replace"), style) or None
+                if entries:
+                    break
+        with self._listing_lock:
+            self._listings[fpath] = entries
+        return entries
+
+    def is_encrypted(self, fpath: str) -> Optional[bool]:
+        entries = self._listing(fpath)
+        if entries is None:
+            return None
+        return any(e["encrypted"] for e in entries)
+
+    def _smallest_encrypted(self, fpath: str) -> Optional[str]:
+        entries = self._listing(fpath)
+        files = [e for e in entries or [] if e["encrypted"] and not e["dir"]]
+        return min(files, key=lambda e: e["size"])["name"] if files else None
+
+    def uncompressed_size(self, fpath: str) -> Optional[int]:
+        """清单中各条目原始大小之和"""
+        entries = self._listing(fpath)
+        if entries is None:
+            return None
+        return sum(e["size"] for e in entries if not e["dir"])
+
+    def extract(self, fpath: str, dest: str, pwd: str) -> bool:
+        return self._run(self._build_cmd(fpath, dest, pwd))
+
+
+def _popen_kwargs() -> dict:
+    """Windows 下隐藏外部解压工具的窗口；其他平台无需处理"""
+    if sys.platform != "win32":
+        return {}
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return {"startupinfo": si}
+
+
+def build_backends(cfg: dict, control: Optional[ProcessControl] = None) -> List[ExtractBackend]:
+    """按优先级返回可用后端：默认先内置 (zip/tar/gz)，再外部工具"""
+    backends = []
+    if cfg.get("prefer_builtin", True):
+        backends.append(BuiltinBackend(control))
+    backends.append(ExternalBackend(cfg.get("engine", "WinRAR"), cfg.get("engine_path", ""), control))
+    return backends
+
+
+def select_backend(backends: List[ExtractBackend], fpath: str) -> Optional[ExtractBackend]:
+    for backend in backends:
+        if backend.supports(fpath):
+            return backend
+    return None
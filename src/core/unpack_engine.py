@@ -1,9 +1,54 @@
 import os
+import time
 import threading
-import subprocess
 import re
-from collections import deque
-from typing import Callable, List, Tuple
+import codecs
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterator, List, Optional, Tuple
+from src.core.unpack_backends import ExtractBackend, build_backends, select_backend
+from src.core.password_pool import PasswordPool
+from src.core.process_control import ProcessControl
+from src.core.unpack_index import UnpackIndex
+from src.core.unpack_journal import STAGING_PREFIX, UnpackJournal, commit_staging, discard_staging, staging_dir_for
+from src.core.unpack_metrics import ArchiveMetric, MetricsRecorder
+from src.core.unpack_scheduler import AdaptiveConcurrency, UnpackScheduler
+from src.core.volumes import VolumeSet, group_volumes, is_volume_name
+from src.utils.disks import SpaceLedger, device_of, is_rotational
+from src.utils.paths import get_base_roots
+
+# 密码说明文件与压缩包后缀 (增加 .001 支持)
+PASSWORD_FILE_EXT = ('.txt', '.nfo')
+ARCHIVE_EXT = ('.rar', '.zip', '.7z', '.tar', '.gz', '.001')
+
+# 估算解压后大小的线程数 (外部工具列清单需要启动进程，不在派发线程中执行)
+SIZE_WORKERS = 2
+
+# 界面上的输出模式名称 -> 引擎内部模式
+OUTPUT_MODES = {"当前目录(散)": "current", "当前+智能文件夹": "current_smart", "指定目录(混)": "custom_direct",
+                "指定+智能文件夹": "custom_smart"}
+
+
+def _fingerprint(path: str) -> Optional[Tuple[int, str]]:
+    """压缩包指纹：大小 + 头部 64 KiB 的哈希，用于识别循环嵌套 (压缩包里套着自己)"""
+    try:
+        with open(path, "rb") as f:
+            return os.fstat(f.fileno()).st_size, hashlib.sha1(f.read(64 * 1024)).hexdigest()
+    except OSError:
+        return None
+
+
+def _decode_text(raw: bytes) -> str:
+    """一次读取后在内存中识别编码：BOM -> UTF-8 -> GBK，不再重复读文件"""
+    if raw.startswith(codecs.BOM_UTF8):
+        return raw[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace')
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return raw.decode('utf-16', errors='replace')
+    try:
+        # 增量解码器容忍截断读取造成的结尾半个字符
+        return codecs.getincrementaldecoder('utf-8')().decode(raw, final=False)
+    except UnicodeDecodeError:
+        return raw.decode('gbk', errors='replace')
 
 
 class UnpackEngine:
@@ -14,215 +59,893 @@ class UnpackEngine:
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._pause_event.set()
-        self.stats = {"success": 0, "fail": 0, "total": 0}
-        self.password_pool = deque()
+        # 运行中的外部解压进程，停止 / 暂停时直接作用于子进程
+        self._control = ProcessControl(self._stop_event, self._pause_event)
+        self.stats = {"success": 0, "fail": 0, "total": 0, "skipped": 0}
+        # 每个工作线程的统计: {线程名: {"done", "success", "fail", "busy"}}
+        self.worker_stats = {}
+        self._stats_lock = threading.Lock()
+        self.password_pool = PasswordPool()
+        # 逐个压缩包的耗时 / 吞吐记录
+        self.metrics = MetricsRecorder()
+        self._discovery_done = threading.Event()
+        self._deferred = []
+        self.index = None
+        self.journal = None
+        self._backends = []
+        self._pwd_executor = None
+        # 并行试密码的滑动窗口大小 (同时提交的尝试数)
+        self._pwd_window = 0
+        self._scan_executor = None
+        self._scan_slots = None
+        self._scan_lock = threading.Lock()
+        self._pending_scans = {}
+        self._source_root = ""
+        self._scheduler = UnpackScheduler()
+        self._device_limits = {}
+        self._adaptive = None
+        self._max_workers = 4
+        # 嵌套解压：压缩包 -> 嵌套层数、已入队的路径、已见过的指纹
+        self._recursive = False
+        self._depths = {}
+        self._queued_paths = set()
+        self._seen_fingerprints = set()
+        self._pending_cond = threading.Condition()
+        # 目标卷空间预留 (check_free_space)
+        self._space = None
+        self._size_executor = None
+        # 压缩包 -> (解压后大小, 是否来自清单)
+        self._size_estimates = {}
+        self._space_waiting = set()
+        self._cfg = {}
 
     def start_task(self, config: dict, manual_password: str):
         self._stop_event.clear()
         self._pause_event.set()
-        self.stats = {"success": 0, "fail": 0, "total": 0}
+        self.stats = {"success": 0, "fail": 0, "total": 0, "skipped": 0}
+        self.worker_stats = {}
+        self.metrics = MetricsRecorder()
         threading.Thread(target=self._run_process, args=(config, manual_password), daemon=True).start()
 
     def pause(self):
         self._pause_event.clear()
+        self._control.suspend_all()
         self.log_callback("⏸️ 任务已暂停...", "warn")
 
     def resume(self):
+        self._control.resume_all()
         self._pause_event.set()
         self.log_callback("▶️ 任务继续", "info")
 
     def stop(self):
         self._stop_event.set()
         self._pause_event.set()
+        # 正在运行的解压进程立即结束，临时目录由各任务自行清理
+        self._control.kill_all()
         self.log_callback("⏹️ 正在停止...", "error")
 
     def _smart_parse_content(self, text: str) -> List[str]:
-        candidates = set()
+        # 按文件中的行序去重 (dict 保持插入顺序)，候选顺序与尝试顺序可复现
+        candidates = {}
         lines = [line.strip() for line in text.splitlines() if line.strip()]
         # 优化正则：匹配密码、code、pwd等关键字
         pattern = re.compile(r"(?:密码|pass|pwd|code|解压)[^:：\s]*[:：]\s*([^\s\u4e00-\u9fa5]+)", re.IGNORECASE)
         for line in lines:
             match = pattern.search(line)
             if match:
-                candidates.add(match.group(1).strip().rstrip('。，.'))
+                candidates.setdefault(match.group(1).strip().rstrip('。，.'))
             clean_line = line.strip(" []【】")
             if 3 < len(clean_line) < 50 and "http" not in clean_line.lower():
-                candidates.add(clean_line)
+                candidates.setdefault(clean_line)
         return list(candidates)
 
-    def _load_txt_passwords(self, source_folder: str) -> List[str]:
-        found_pwds = set()
-        self.log_callback("🔎 扫描密码...", "info")
+    def _read_password_file(self, path: str, max_bytes: int = 0) -> List[str]:
+        """
+        解析单个 txt/nfo 文件中的候选密码。
+        max_bytes > 0 时只读取文件开头部分 (密码说明通常在开头，避免把数 GB 的日志读进内存)。
+        """
         try:
-            for root, _, files in os.walk(source_folder):
-                for f in files:
-                    if f.lower().endswith(('.txt', '.nfo')):
-                        try:
-                            path = os.path.join(root, f)
-                            try:
-                                with open(path, 'r', encoding='utf-8') as tf:
-                                    content = tf.read()
-                            except UnicodeDecodeError:
-                                with open(path, 'r', encoding='gbk') as tf:
-                                    content = tf.read()
-                            for p in self._smart_parse_content(content):
-                                found_pwds.add(p)
-                        except Exception:
-                            continue
+            with open(path, 'rb') as tf:
+                raw = tf.read(max_bytes) if max_bytes > 0 else tf.read()
+            return self._smart_parse_content(_decode_text(raw))
         except Exception:
-            pass
-        return list(found_pwds)
+            return []
 
-    # === 🔥 新增：分卷首卷判断逻辑 ===
-    def _is_main_volume(self, filename: str) -> bool:
+    def _scan_password_file(self, path: str, max_bytes: int):
+        self._add_passwords(self._read_password_file(path, max_bytes), os.path.dirname(path))
+
+    def _submit_scan(self, path: str, max_bytes: int):
+        """提交到扫描线程池 (有界)，并按目录登记，供同目录/子目录的压缩包等待"""
+        self._scan_slots.acquire()
+        fut = self._scan_executor.submit(self._scan_password_file, path, max_bytes)
+        fut.add_done_callback(lambda _f: self._scan_slots.release())
+        key = os.path.normcase(os.path.abspath(os.path.dirname(path)))
+        with self._scan_lock:
+            self._pending_scans.setdefault(key, []).append(fut)
+
+    def _wait_for_scans(self, archive_dir: str):
+        """等待压缩包所在目录及其上级目录中的说明文件解析完成"""
+        folder = os.path.normcase(os.path.abspath(archive_dir))
+        futures = []
+        with self._scan_lock:
+            while True:
+                futs = self._pending_scans.get(folder)
+                if futs:
+                    futs[:] = [f for f in futs if not f.done()]
+                    futures.extend(futs)
+                parent = os.path.dirname(folder)
+                if folder == self._source_root or parent == folder:
+                    break
+                folder = parent
+        if futures:
+            wait(futures)
+
+    def _discover(self, source_folder: str) -> Iterator[Tuple[str, object]]:
         """
-        判断文件是否为压缩包的主文件（首卷）。
-        如果是分卷的第二部分（如 part2.rar, .z01, .002），则返回 False。
+        单次 os.scandir 遍历，边走边产出 ("pwd", 路径) 与 ("archive", VolumeSet)。
+        同一目录内的分卷按命名规则归为一组；密码文件先于压缩包产出。
         """
-        name_lower = filename.lower()
-
-        # 1. 处理 .partN.rar 格式 (例如 test.part1.rar)
-        # 提取 .part 后面的数字
-        part_match = re.search(r'\.part(\d+)\.rar$', name_lower)
-        if part_match:
-            # 只有当数字是 1 时，才是主卷
-            return int(part_match.group(1)) == 1
-
-        # 2. 处理 .z01, .z02, .r01 等旧式分卷
-        # 这些文件的后缀本身就是分卷号，主文件通常是 .zip 或 .rar
-        # 如果遇到 .z01 或 .r01 结尾，直接忽略，因为 os.walk 会扫到同名的 .zip/.rar
-        if re.search(r'\.[z|r]\d+$', name_lower):
-            return False
+        stack = [source_folder]
+        while stack:
+            if self._stop_event.is_set():
+                return
+            folder = stack.pop()
+            pwd_files, archives, sub_dirs = [], [], []
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                # 跳过正在解压 / 中断残留的临时目录
+                                if not entry.name.startswith(STAGING_PREFIX):
+                                    sub_dirs.append(entry.path)
+                                continue
+                            if not entry.is_file():
+                                continue
+                        except OSError:
+                            continue
+                        name_lower = entry.name.lower()
+                        if name_lower.endswith(PASSWORD_FILE_EXT):
+                            pwd_files.append(entry.path)
+                        # 非首卷 (.z01 / .002 / .part2.rar) 也要收集，用于分组与完整性检查
+                        elif name_lower.endswith(ARCHIVE_EXT) or is_volume_name(entry.name):
+                            try:
+                                archives.append((entry.path, entry.stat().st_size))
+                            except OSError:
+                                continue
+            except OSError:
+                continue
 
-        # 3. 处理 .001, .002 格式 (例如 data.7z.001)
-        # 只有 .001 是主卷
-        num_ext_match = re.search(r'\.(\d{3})$', name_lower)
-        if num_ext_match:
-            return num_ext_match.group(1) == '001'
+            for path in sorted(pwd_files):
+                yield "pwd", path
+            # 同一目录内先产出大的分卷组，配合调度队列实现大任务优先
+            for vset in sorted(group_volumes(archives), key=lambda v: (-v.total_size, v.key)):
+                yield "archive", vset
+            # 逆序入栈，使子目录按名称顺序深度优先处理 (与 os.walk 顺序一致)
+            stack.extend(sorted(sub_dirs, reverse=True))
 
-        # 4. 其他常规后缀 (.zip, .rar, .7z) 默认都是主卷
-        return True
+    def _add_passwords(self, pwds: List[str], source_dir: str):
+        for p in pwds:
+            self.password_pool.add(p, source_dir)
 
-    # ===================================
+    def _open_password_pool(self, cfg: dict, manual_password: str) -> PasswordPool:
+        stats_file = None
+        if cfg.get("password_stats", True):
+            try:
+                stats_file = os.path.join(get_base_roots()["config_dir"], "password_stats.json")
+            except Exception:
+                stats_file = None
+        pool = PasswordPool(stats_file)
+        for p in (manual_password.split() if manual_password else []):
+            pool.add(p.strip(), manual=True)
+        return pool
 
     def _run_process(self, cfg: dict, manual_password: str):
-        unique_pwds = [p.strip() for p in manual_password.split()] if manual_password else []
-        # 只有在非指定密码模式下才去扫描txt
-        if not manual_password:
-            for p in self._load_txt_passwords(cfg['source_folder']):
-                if p not in unique_pwds:
-                    unique_pwds.append(p)
-        self.password_pool = deque(unique_pwds)
-
-        # 增加 .001 支持
-        valid_ext = ('.rar', '.zip', '.7z', '.tar', '.gz', '.001')
-        tasks = []
-
+        run_t0 = time.perf_counter()
+        self.password_pool = self._open_password_pool(cfg, manual_password)
+        self._deferred = []
+        self._discovery_done.clear()
+        # 先检查源目录，再打开索引与运行日志 (提前返回时不会留下空日志和未关闭的句柄)
         if not os.path.exists(cfg['source_folder']):
+            self.log_callback(f"❌ 源文件夹不存在: {cfg['source_folder']}", "error")
             self.finish_callback(self.stats, aborted=True)
             return
+        self.index = self._open_index(cfg)
+        self.journal = self._open_journal(cfg)
+        self._backends = build_backends(cfg, self._control)
+        self._source_root = os.path.normcase(os.path.abspath(cfg['source_folder']))
+        self._pending_scans = {}
+        self._device_limits = {}
+        self._scheduler = UnpackScheduler(self._device_limit if cfg.get("per_device_limits", True) else None)
+        self._cfg = cfg
+        self._recursive = bool(cfg.get("recursive_unpack", False))
+        if self._recursive and not cfg.get("atomic_extract", True):
+            # 没有临时目录就无法区分哪些文件是本次解压出来的
+            self.log_callback("⚠️ 嵌套解压需要开启 atomic_extract，本次不递归", "warn")
+            self._recursive = False
+        self._depths = {}
+        self._queued_paths = set()
+        self._seen_fingerprints = set()
+        self._space = SpaceLedger(int(float(cfg.get("free_space_margin_mb", 512)) * 1048576)) \
+            if cfg.get("check_free_space", True) else None
+        self._size_estimates = {}
+        self._space_waiting = set()
+
+        self.log_callback("🔍 扫描文件中 (边扫描边解压)...", "info")
+
+        max_workers = self._open_adaptive(cfg)
+        self._max_workers = max_workers
+        # 有界提交：同一时刻最多 max_workers * 2 个任务在线程池中排队/执行，
+        # 线程数与内存占用只和 max_workers 相关，与压缩包数量无关
+        slots = threading.BoundedSemaphore(max_workers * 2)
+        pending = [0]
+        pending_cond = threading.Condition()
+        self._pending_cond = pending_cond
+        # 收尾阶段：已没有进行中的任务能释放空间，仍放不下的任务直接判失败
+        space_final = [False]
+
+        def _on_done(devices: frozenset, size: int, key: str):
+            self._scheduler.release(devices)
+            slots.release()
+            # 数据已实际落盘 (或已清理)，释放预留；删除源文件等可能腾出了空间，搁置的任务重新参与调度
+            if self._space and self._space.release(key) and self._scheduler.parked:
+                self._scheduler.unpark()
+            with pending_cond:
+                pending[0] -= 1
+                active = pending[0] + 1
+                pending_cond.notify_all()
+            if self._adaptive:
+                self._adaptive.add_bytes(size)
+                self._adaptive_tick(active)
 
-        self.log_callback("🔍 扫描文件中...", "info")
+        def _leave():
+            with pending_cond:
+                pending[0] -= 1
+                pending_cond.notify_all()
 
-        for root, _, files in os.walk(cfg['source_folder']):
-            for f in files:
-                # 1. 基本后缀检查
-                if f.lower().endswith(valid_ext):
-                    # 2. 🔥 智能过滤：跳过分卷的非首卷文件
-                    if self._is_main_volume(f):
-                        tasks.append((os.path.join(root, f), cfg))
+        def _on_sized(task: tuple, devices: frozenset):
+            # 先放回队列再减计数，_drain 不会在两者之间误判为空闲
+            self._scheduler.push(task, task[0].total_size, devices)
+            _leave()
+            # 扫描线程可能正在遍历没有压缩包的长目录，不等它下一次派发，这里直接提交
+            if not self._stop_event.is_set():
+                _dispatch(block=False)
+
+        def _dispatch(block: bool) -> bool:
+            """从调度队列取任务提交到线程池；block=False 时没有空闲槽位就立即返回，不拖慢扫描"""
+            while len(self._scheduler):
+                self._pause_event.wait()
+                if self._stop_event.is_set():
+                    return False
+                if self._adaptive and pending[0] >= self._adaptive.limit:
+                    # 自适应模式：活动任务数已达当前并发档位
+                    if not block:
+                        return True
+                    with pending_cond:
+                        pending_cond.wait(0.5)
+                    continue
+                if not slots.acquire(blocking=block):
+                    return True
+                # 出队前先计入进行中：估算完成的回调也会派发，_drain 不能在“已出队、未提交”的间隙判定为空闲
+                with pending_cond:
+                    pending[0] += 1
+                picked = self._scheduler.pop()
+                if picked is None:
+                    # 剩余任务所在设备都已满载：非阻塞模式直接返回，阻塞模式等任意任务结束再试
+                    slots.release()
+                    _leave()
+                    if not block:
+                        return True
+                    with pending_cond:
+                        pending_cond.wait(0.5)
+                    continue
+                task, devices = picked
+                if self._space and task[0].main_path not in self._size_estimates:
+                    # 解压后大小未知：交给估算线程池 (仍计入进行中)，估算完成后重新入队
+                    self._scheduler.release(devices)
+                    slots.release()
+                    self._size_executor.submit(self._estimate_size, task[0]).add_done_callback(
+                        lambda _f, t=task, d=devices: _on_sized(t, d))
+                    continue
+                # pending 已包含本任务：等于 1 表示没有其他任务在运行
+                if self._space and not self._reserve_space(task[0], task[1], alone=pending[0] == 1):
+                    self._scheduler.release(devices)
+                    slots.release()
+                    if space_final[0] and pending[0] == 1:
+                        self._fail_no_space(task[0])
                     else:
-                        # 可选：打印跳过信息，或者静默跳过
-                        # self.log_callback(f"分卷跳过: {f}", "info")
-                        pass
-
-        self.stats["total"] = len(tasks)
-        if self.stats["total"] == 0:
-            self.log_callback("⚠️ 未发现可处理的压缩包", "warn")
-            self.finish_callback(self.stats)
-            return
+                        self._scheduler.park(task, task[0].total_size, devices)
+                    _leave()
+                    continue
+                pool.submit(self._unpack_wrapper, *task).add_done_callback(
+                    lambda _f, d=devices, n=task[0].total_size, k=task[0].main_path: _on_done(d, n, k))
+            return not self._stop_event.is_set()
 
-        self.log_callback(f"🚀 发现 {len(tasks)} 个主压缩包，开始处理...", "info")
+        def _drain():
+            """提交剩余任务并等待全部结束；嵌套解压会在运行中追加新任务，需循环直到队列与线程池都空"""
+            while not self._stop_event.is_set():
+                _dispatch(block=True)
+                with pending_cond:
+                    pending_cond.wait_for(lambda: pending[0] == 0 or len(self._scheduler) > 0)
+                    idle = pending[0] == 0 and not len(self._scheduler)
+                if idle:
+                    if not self._scheduler.parked:
+                        return
+                    # 没有进行中的任务了，搁置的任务再也等不到空间：最后试一次，仍放不下的判失败
+                    space_final[0] = True
+                    self._scheduler.unpark()
 
-        max_workers = cfg.get("max_workers", 4)
-        semaphore = threading.Semaphore(max_workers)
-        threads = []
+        # 单个压缩包内并行试密码的子线程池 (password_workers > 1 时启用)
+        pwd_workers = max(1, int(cfg.get("password_workers", 1)))
+        if pwd_workers > 1:
+            self._pwd_executor = ThreadPoolExecutor(max_workers=pwd_workers, thread_name_prefix="pwd")
+            self._pwd_window = pwd_workers * 2
 
-        for i, (fpath, task_cfg) in enumerate(tasks):
-            if self._stop_event.is_set():
-                break
-            self._pause_event.wait()
-            semaphore.acquire()
-            t = threading.Thread(target=self._unpack_wrapper, args=(fpath, task_cfg, semaphore))
-            threads.append(t)
-            t.start()
-            self.progress_callback((i + 1) / len(tasks))
-
-        for t in threads:
-            t.join()
+        if self._space:
+            self._size_executor = ThreadPoolExecutor(max_workers=SIZE_WORKERS, thread_name_prefix="size")
+
+        # 说明文件解析线程池：与解压并行，且不阻塞目录遍历
+        scan_workers = max(1, int(cfg.get("scan_workers", 4)))
+        scan_max_bytes = max(0, int(cfg.get("password_scan_max_bytes", 1024 * 1024)))
+        self._scan_executor = ThreadPoolExecutor(max_workers=scan_workers, thread_name_prefix="scan")
+        self._scan_slots = threading.BoundedSemaphore(scan_workers * 4)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="unpack") as pool:
+            announced = False
+            resumed = 0
+            for kind, item in self._discover(cfg['source_folder']):
+                if self._stop_event.is_set():
+                    break
+                if kind == "pwd":
+                    # 只有在非指定密码模式下才去解析txt
+                    if not manual_password:
+                        self._submit_scan(item, scan_max_bytes)
+                    continue
+                vset = item
+                if vset.orphan:
+                    self.log_callback(f"ℹ️ 忽略没有首卷的分卷文件: {', '.join(os.path.basename(p) for p in vset.parts)}",
+                                      "info")
+                    continue
+                if not vset.complete:
+                    # 缺卷的分卷组直接判失败，不浪费一次解压尝试
+                    with self._stats_lock:
+                        self.stats["total"] += 1
+                        self.stats["fail"] += 1
+                    self.log_callback(f"⚠️ 分卷不完整，跳过: {os.path.basename(vset.key)} "
+                                      f"(缺少: {', '.join(vset.missing)})", "warn")
+                    continue
+                if self.index and self._is_unchanged_success(vset.main_path, cfg):
+                    with self._stats_lock:
+                        self.stats["skipped"] += 1
+                    continue
+                if self.journal is not None and self._is_journal_finished(vset.main_path):
+                    resumed += 1
+                    with self._stats_lock:
+                        self.stats["skipped"] += 1
+                    continue
+                if self._recursive and not self._claim_path(vset.main_path):
+                    # 已作为嵌套压缩包入队 (解压目标位于源目录内时，扫描可能再次遇到它)
+                    continue
+                with self._stats_lock:
+                    self.stats["total"] += 1
+                if not announced:
+                    announced = True
+                    self.log_callback("🚀 发现压缩包，开始处理...", "info")
+                self._scheduler.push((vset, cfg), vset.total_size, self._task_devices(vset, cfg))
+                if not _dispatch(block=False):
+                    break
+            # 所有说明文件解析完毕，密码池才算完整
+            self._scan_executor.shutdown(wait=True, cancel_futures=self._stop_event.is_set())
+            self._discovery_done.set()
+
+            if resumed:
+                self.log_callback(f"♻️ 续传: 跳过 {resumed} 个上次运行中已成功的压缩包", "info")
+            if self.stats["skipped"] - resumed:
+                self.log_callback(f"⏭️ 索引命中: 跳过 {self.stats['skipped'] - resumed} 个已成功且未变化的压缩包", "info")
+            if not self._stop_event.is_set() and self.stats["total"]:
+                self.log_callback(f"📋 扫描完成: 共 {self.stats['total']} 个主压缩包, "
+                                  f"{len(self.password_pool)} 个候选密码", "info")
+                # 扫描期间失败的压缩包：等首轮全部结束后，用之后才发现的新密码再试一次
+                _drain()
+                deferred, self._deferred = self._deferred, []
+                for vset, task_cfg, tried in deferred:
+                    self._scheduler.push((vset, task_cfg, tried), vset.total_size, self._task_devices(vset, task_cfg))
+                _drain()
+
+        if self._adaptive:
+            level, rate = self._adaptive.best
+            if rate:
+                self.log_callback(f"🎯 自适应并发: 最佳档位 {level} 线程 ({rate / 1048576:.1f} MB/s)", "info")
+            else:
+                self.log_callback(f"🎯 自适应并发: 样本不足，保持 {self._adaptive.limit} 线程", "info")
+            self._adaptive = None
+        self.password_pool.save_stats()
+        if self._pwd_executor:
+            self._pwd_executor.shutdown(wait=True, cancel_futures=True)
+            self._pwd_executor = None
+        if self._size_executor:
+            self._size_executor.shutdown(wait=True, cancel_futures=True)
+            self._size_executor = None
+        if self.index:
+            self.index.close()
+            self.index = None
+        if self.journal is not None:
+            self.journal.close(completed=not self._stop_event.is_set())
+            self.journal = None
+        if self.stats["total"] == 0 and not self._stop_event.is_set():
+            if self.stats["skipped"]:
+                self.log_callback("✅ 没有新增或变化的压缩包", "info")
+            else:
+                self.log_callback("⚠️ 未发现可处理的压缩包", "warn")
+        self._log_worker_stats()
+        self._report_metrics(cfg, time.perf_counter() - run_t0)
         self.finish_callback(self.stats, aborted=self._stop_event.is_set())
 
-    def _unpack_wrapper(self, fpath: str, cfg: dict, semaphore: threading.Semaphore):
-        try:
-            if self._stop_event.is_set():
-                return
-            self._pause_event.wait()
-            if self._try_unpack_with_pool(fpath, cfg):
-                self.stats["success"] += 1
+    def _report_metrics(self, cfg: dict, wall_time: float):
+        """输出本次运行的汇总；配置了 metrics_path 时导出逐个压缩包的记录 (.csv / .json)"""
+        if not len(self.metrics):
+            return
+        summary = self.metrics.summary(wall_time)
+        self.log_callback(f"📊 共处理 {summary['bytes'] / 1048576:.1f} MB, 用时 {wall_time:.1f}s, "
+                          f"整体 {summary['throughput'] / 1048576:.1f} MB/s, "
+                          f"试密码 {summary['attempts']} 次", "info")
+        for name, b in summary["by_backend"].items():
+            self.log_callback(f"📊 {name}: {b['count']} 个, 单任务 {b['bytes_per_sec'] / 1048576:.1f} MB/s", "info")
+        if summary["slowest"]:
+            slowest = summary["slowest"][0]
+            self.log_callback(f"🐢 最慢: {os.path.basename(slowest['path'])} ({slowest['total_time']:.1f}s)", "info")
+        path = cfg.get("metrics_path")
+        if path:
+            err = self.metrics.export(path, wall_time)
+            if err:
+                self.log_callback(f"⚠️ 统计导出失败: {err}", "warn")
             else:
-                self.stats["fail"] += 1
-        finally:
-            semaphore.release()
+                self.log_callback(f"📄 统计已导出: {path}", "info")
 
-    def _try_unpack_with_pool(self, fpath: str, cfg: dict) -> bool:
-        fname = os.path.basename(fpath)
+    def _open_adaptive(self, cfg: dict) -> int:
+        """
+        max_workers 为 0 或 "auto" 时启用自适应并发，返回线程池大小。
+        线程池按上限 auto_max_workers 创建，实际同时运行的任务数由爬山法在 1..上限 之间调整。
+        """
+        value = cfg.get("max_workers", 4)
+        if str(value).strip().lower() not in ("0", "auto"):
+            self._adaptive = None
+            return max(1, int(value))
+        hi = max(1, int(cfg.get("auto_max_workers", 16)))
+        self._adaptive = AdaptiveConcurrency(start=min(2, hi), lo=1, hi=hi,
+                                             window=float(cfg.get("auto_window", 5.0)))
+        self.log_callback(f"🤖 自适应并发: 初始 {self._adaptive.limit} 线程，上限 {hi}", "info")
+        return hi
 
-        # 修正：对于 .001 或 .part1.rar 文件，在生成文件夹名时要去掉这些后缀
-        # 简单处理：如果是 .part1.rar，去掉 .part1.rar；如果是 .7z.001，去掉 .001
-        base = os.path.splitext(fname)[0]  # 默认去掉最后一个后缀
+    def _adaptive_tick(self, active: int):
+        """
+        只有并发档位被占满且仍有任务排队时，吞吐才反映档位的好坏
+        (受设备并发上限卡住或任务已所剩无几时不调整)；档位变化时记录日志
+        """
+        adaptive = self._adaptive
+        if adaptive is None:
+            return
+        changed = adaptive.tick(saturated=active >= adaptive.limit and len(self._scheduler) > 0)
+        if changed:
+            old, new, rate = changed
+            self.log_callback(f"📈 自适应并发: {old} -> {new} 线程 (上一窗口 {rate / 1048576:.1f} MB/s)", "info")
 
-        # 针对特殊分卷名的文件夹命名优化
-        if ".part" in fname.lower() and fname.lower().endswith(".rar"):
-            # A.part1.rar -> A
-            base = re.sub(r'\.part\d+$', '', base, flags=re.IGNORECASE)
-        elif fname.lower().endswith(".001"):
-            # A.7z.001 -> A.7z (base已经是 A.7z 了) -> 如果想纯名可以是 A
-            if base.lower().endswith(".7z"):
-                base = base[:-3]
-        elif fname.lower().endswith(".tar.gz"):
-            base = fname[:-7]
+    def _task_devices(self, vset: VolumeSet, cfg: dict) -> frozenset:
+        """任务涉及的物理设备：源文件所在设备 + 解压目标所在设备 (同一设备只算一次)"""
+        devs = {device_of(vset.main_path), device_of(self._resolve_dest(vset.main_path, cfg))}
+        devs.discard(None)
+        return frozenset(devs)
+
+    def _device_limit(self, dev: int) -> int:
+        """设备并发上限：机械硬盘 hdd_workers，固态 ssd_workers，无法识别时沿用 max_workers"""
+        limit = self._device_limits.get(dev)
+        if limit is None:
+            rotational = is_rotational(dev)
+            if rotational is True:
+                limit, kind = int(self._cfg.get("hdd_workers", 1)), "机械硬盘"
+            elif rotational is False:
+                limit, kind = int(self._cfg.get("ssd_workers", 8)), "固态硬盘"
+            else:
+                limit, kind = self._max_workers, "未知类型"
+            limit = max(1, limit)
+            self._device_limits[dev] = limit
+            self.log_callback(f"💽 设备 {dev}: {kind}，并发上限 {limit}", "info")
+        return limit
+
+    def _unpack_wrapper(self, vset: VolumeSet, cfg: dict, tried: frozenset = frozenset()):
+        fpath = vset.main_path
+        if self._stop_event.is_set():
+            return
+        self._pause_event.wait()
+        if self._stop_event.is_set():
+            return
+        t0 = time.perf_counter()
+        metric = ArchiveMetric(fpath, vset.total_size, len(vset.parts))
+        metric.attempts = len(tried)
+        self._wait_for_scans(os.path.dirname(fpath))
+        metric.wait_time = time.perf_counter() - t0
+        try:
+            st = os.stat(fpath)
+        except OSError:
+            st = None
+        # 在取候选快照之前读取：快照之后才扫完的说明文件中的密码不在本次尝试里，失败时仍需挂起重试
+        discovery_done = self._discovery_done.is_set()
+        # 先试本目录及上级目录说明文件中的密码，失败后再退回全局密码池
+        local, fallback = self.password_pool.scoped(os.path.dirname(fpath))
+        local = [p for p in local if p not in tried]
+        fallback = [p for p in fallback if p not in tried]
+        # 索引中记录的上次可用密码优先尝试
+        rec = self.index.lookup(fpath, st) if self.index and st else None
+        if rec and rec["password"] and rec["password"] not in tried:
+            local = [rec["password"]] + [p for p in local if p != rec["password"]]
+            fallback = [p for p in fallback if p != rec["password"]]
+        if not local and not fallback and not tried:
+            local = [""]
+        candidates = local + fallback
+        # 本次解压出的顶层条目，记入索引用于判断解压结果是否还在
+        outputs = []
+        try:
+            used_pwd = self._try_unpack_with_pool(vset, cfg, [local, fallback], metric, outputs,
+                                                  rec["password"] if rec else None)
+        except Exception as e:
+            self.log_callback(f"❌ 异常: {os.path.basename(fpath)} ({e})", "error")
+            used_pwd = None
+        ok = used_pwd is not None
+        if not ok and not self._stop_event.is_set() and not discovery_done:
+            # 目录树尚未扫完，后面可能还会找到密码，先挂起等待重试
+            with self._stats_lock:
+                self._deferred.append((vset, cfg, tried | frozenset(candidates)))
+            return
+        if not ok and not self._stop_event.is_set():
+            self.log_callback(f"❌ 失败: {os.path.basename(fpath)}", "error")
+        if self.index and st and not self._stop_event.is_set():
+            self.index.record(fpath, st, "success" if ok else "fail", used_pwd,
+                              self._resolve_dest(fpath, cfg), outputs)
+        if self.journal is not None and not self._stop_event.is_set():
+            self.journal.finished(fpath, st, "success" if ok else "fail")
+        metric.total_time = time.perf_counter() - t0
+        stopped = not ok and self._stop_event.is_set()
+        metric.status = "success" if ok else ("stopped" if stopped else "fail")
+        self.metrics.add(metric)
+        if stopped:
+            # 被停止打断的不算失败 (与 metric 的 stopped 一致)，下次运行会重新处理
+            return
+        self._record_result(ok, metric.total_time)
+
+    def _open_index(self, cfg: dict) -> Optional[UnpackIndex]:
+        if not cfg.get("use_index", True):
+            return None
+        try:
+            db_path = os.path.join(get_base_roots()["config_dir"], "unpack_index.db")
+            return UnpackIndex(db_path)
+        except Exception as e:
+            self.log_callback(f"⚠️ 解压索引不可用，本次全量处理 ({e})", "warn")
+            return None
+
+    def _open_journal(self, cfg: dict) -> Optional[UnpackJournal]:
+        """打开本源目录的运行日志；存在上次中断的日志时清理残留的临时目录并续传"""
+        if not cfg.get("resume_journal", True):
+            return None
+        try:
+            journal_dir = os.path.join(get_base_roots()["config_dir"], "journal")
+            journal = UnpackJournal(UnpackJournal.path_for(journal_dir, cfg))
+        except Exception as e:
+            self.log_callback(f"⚠️ 运行日志不可用，本次无法断点续传 ({e})", "warn")
+            return None
+        if not journal.is_empty():
+            leftovers = journal.interrupted_staging()
+            for staging in leftovers:
+                discard_staging(staging)
+            self.log_callback(f"♻️ 检测到上次未完成的运行: 已成功 {journal.finished_count()} 个, "
+                              f"清理中断的临时目录 {len(leftovers)} 个", "info")
+        return journal
+
+    def _is_journal_finished(self, fpath: str) -> bool:
+        try:
+            return self.journal.is_finished(fpath, os.stat(fpath))
+        except OSError:
+            return False
+
+    def _is_unchanged_success(self, fpath: str, cfg: dict) -> bool:
+        try:
+            return self.index.should_skip(fpath, os.stat(fpath), self._resolve_dest(fpath, cfg))
+        except OSError:
+            return False
+
+    def _record_result(self, ok: bool, elapsed: float):
+        """汇总全局与单线程统计 (多线程写入，需加锁)"""
+        name = threading.current_thread().name
+        with self._stats_lock:
+            self.stats["success" if ok else "fail"] += 1
+            ws = self.worker_stats.setdefault(name, {"done": 0, "success": 0, "fail": 0, "busy": 0.0})
+            ws["done"] += 1
+            ws["success" if ok else "fail"] += 1
+            ws["busy"] += elapsed
+            finished = self.stats["success"] + self.stats["fail"]
+            total = self.stats["total"]
+        # 进度按“完成”计算，而不是按“开始”；扫描期间总数仍在增长
+        self.progress_callback(finished / total if total else 0)
 
-        # 临时将优化后的 base 存入 cfg 传给 execute (这里稍微 hack 一下，或者修改 execute 逻辑)
-        # 更好的方式是在 _execute_unpack 内部重新计算 dest
+    def _log_worker_stats(self):
+        with self._stats_lock:
+            items = sorted(self.worker_stats.items())
+        for name, ws in items:
+            self.log_callback(f"🧵 {name}: 完成 {ws['done']} (成功 {ws['success']} / 失败 {ws['fail']}), "
+                              f"耗时 {ws['busy']:.1f}s", "info")
 
-        current_candidates = list(self.password_pool) if self.password_pool else [""]
-        for pwd in current_candidates:
+    def _try_unpack_with_pool(self, vset: VolumeSet, cfg: dict, tiers: List[List[str]],
+                              metric: ArchiveMetric, outputs: Optional[List[str]] = None,
+                              known_pwd: Optional[str] = None) -> Optional[str]:
+        """
+        按层级 (本地 -> 全局) 尝试候选密码，前一层全部失败才进入下一层。
+        known_pwd 为索引中记录的上次可用密码，与历史命中过的密码一起排在本层最前、单独先试。
+        成功时返回使用的密码 (无密码为 "")，失败返回 None；尝试次数与各阶段耗时写入 metric
+        """
+        fpath = vset.main_path
+        fname = os.path.basename(fpath)
+        t0 = time.perf_counter()
+        backend = select_backend(self._backends, fpath)
+        if backend is None:
+            self.log_callback(f"⚠️ 无可用解压后端: {fname}", "warn")
+            return None
+        metric.backend = backend.name
+        dest = self._resolve_dest(fpath, cfg)
+
+        # 有多个候选时先用测试模式确定密码，再只做一次真正的解压；
+        # 若测试通过但解压失败 (极少数误判)，继续尝试后面的候选
+        # 确定没有加密 (zip 中央目录 / rar、7z 清单) 时不试密码，直接一次无密码解压
+        if backend.is_encrypted(fpath) is False:
+            tiers = [[""]]
+        proven = {p for tier in tiers for p in tier if p and (p == known_pwd or self.password_pool.is_proven(p))}
+        for level, remaining in enumerate(tiers):
+            if level > 0 and remaining:
+                self.log_callback(f"🔁 本地密码无效，尝试全局密码池 ({len(remaining)} 个): {fname}", "info")
+            # 稳定排序：已验证过的密码提前，其余保持原有排名
+            remaining = sorted(remaining, key=lambda p: p not in proven)
+            while remaining:
+                if len(remaining) == 1:
+                    # 只剩一个候选 (含无密码)：测试并不比解压便宜 (外部工具的 t 同样完整解码)，直接解压
+                    pwd = remaining[0]
+                    metric.attempts += 1
+                else:
+                    lead = sum(1 for p in remaining if p in proven)
+                    pwd = self._find_password(backend, fpath, remaining, metric, lead)
+                if pwd is None:
+                    break
+                metric.password_time = time.perf_counter() - t0
+                remaining = remaining[remaining.index(pwd) + 1:]
+                if self._stop_event.is_set():
+                    return None
+                t_extract = time.perf_counter()
+                nested = [] if self._recursive else None
+                extracted = self._execute_unpack(backend, fpath, dest, pwd, nested, outputs)
+                metric.extract_time += time.perf_counter() - t_extract
+                if extracted:
+                    self.password_pool.record_hit(pwd)
+                    self.log_callback(f"✅ 成功: {fname}", "success")
+                    if nested:
+                        self._feed_nested(vset, cfg, dest, pwd, nested)
+                    if cfg.get('delete_source'):
+                        self._delete_sources(vset, cfg)
+                    return pwd
             if self._stop_event.is_set():
-                return False
-            # 注意：这里传进去的 base 是为了下面计算路径用的，但 _execute_unpack 里又算了一遍
-            # 我们直接在 _execute_unpack 里优化路径计算
-            if self._execute_unpack(fpath, cfg, pwd):
-                if pwd and len(self.password_pool) > 1 and self.password_pool[0] != pwd:
-                    try:
-                        self.password_pool.remove(pwd)
-                        self.password_pool.appendleft(pwd)
-                    except ValueError:
-                        pass
-                self.log_callback(f"✅ 成功: {fname}", "success")
-                if cfg['delete_source']:
-                    # 🔥 删除逻辑增强：如果是分卷成功，需要删除所有分卷吗？
-                    # 风险较高，建议如果是分卷，只删除当前文件或者不做操作。
-                    # 简单起见，目前只删除传入的这个主文件。
-                    # 如果要删除所有分卷，需要额外的逻辑去寻找同名分卷。
+                return None
+        return None
+
+    def _estimate_size(self, vset: VolumeSet) -> Tuple[int, bool]:
+        """
+        解压后大小及是否来自清单：能读到清单的用清单 (zip 中央目录 / gzip ISIZE / rar、7z 的命令行列表)，
+        否则按压缩包大小 x space_unlisted_ratio 估算。在估算线程池中执行
+        """
+        key = vset.main_path
+        est = self._size_estimates.get(key)
+        if est is None:
+            try:
+                backend = select_backend(self._backends, key)
+                size = backend.uncompressed_size(key) if backend else None
+            except Exception:
+                size = None
+            if size is None:
+                est = (int(vset.total_size * float(self._cfg.get("space_unlisted_ratio", 4.0))), False)
+            else:
+                est = (size, True)
+            self._size_estimates[key] = est
+        return est
+
+    def _reserve_space(self, vset: VolumeSet, cfg: dict, alone: bool = False) -> bool:
+        """
+        按估算预留目标空间。读不到清单时估算只是猜测，不能据此判失败：
+        放不下时等到没有其他任务在运行 (alone)，再按压缩包本身大小 (解压后一般不会更小) 预留后开始
+        """
+        key = vset.main_path
+        need, listed = self._size_estimates[key]
+        dest = self._resolve_dest(key, cfg)
+        if self._space.reserve(key, dest, need):
+            self._space_waiting.discard(key)
+            return True
+        if not listed and alone and self._space.reserve(key, dest, vset.total_size):
+            self._space_waiting.discard(key)
+            self.log_callback(f"⚠️ 无法读取清单，空间可能不足，单独开始: {os.path.basename(key)} "
+                              f"(估算 {need / 1048576:.1f} MB)", "warn")
+            return True
+        if key not in self._space_waiting:
+            self._space_waiting.add(key)
+            self.log_callback(f"⏳ 目标空间不足，暂缓: {os.path.basename(key)} "
+                              f"(需要 {need / 1048576:.1f} MB{'' if listed else ', 估算'})", "warn")
+        return False
+
+    def _fail_no_space(self, vset: VolumeSet):
+        need, listed = self._size_estimates[vset.main_path]
+        # 未列出清单的只有连压缩包本身大小都放不下时才会走到这里
+        need = need if listed else vset.total_size
+        self.log_callback(f"❌ 目标空间不足，跳过: {os.path.basename(vset.main_path)} "
+                          f"(需要 {need / 1048576:.1f} MB)", "error")
+        metric = ArchiveMetric(vset.main_path, vset.total_size, len(vset.parts))
+        metric.status = "fail"
+        self.metrics.add(metric)
+        with self._stats_lock:
+            self.stats["fail"] += 1
+            finished = self.stats["success"] + self.stats["fail"]
+            total = self.stats["total"]
+        self.progress_callback(finished / total if total else 0)
+
+    @staticmethod
+    def _list_archives(root: str) -> List[Tuple[str, int]]:
+        """列出目录树中的压缩包及分卷 [(相对路径, 大小)]"""
+        found = []
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith(STAGING_PREFIX)]
+            for name in files:
+                if name.lower().endswith(ARCHIVE_EXT) or is_volume_name(name):
+                    path = os.path.join(folder, name)
                     try:
-                        os.remove(fpath)
+                        found.append((os.path.relpath(path, root), os.path.getsize(path)))
                     except OSError:
-                        pass
+                        continue
+        return found
+
+    def _claim_path(self, path: str) -> bool:
+        """登记入队的压缩包路径，已登记过返回 False"""
+        key = os.path.normcase(os.path.abspath(path))
+        with self._stats_lock:
+            if key in self._queued_paths:
+                return False
+            self._queued_paths.add(key)
+            return True
+
+    def _feed_nested(self, parent: VolumeSet, cfg: dict, dest: str, pwd: str, nested: List[Tuple[str, int]]):
+        """把解压出的压缩包直接加入当前任务队列 (不重新扫描目录树)，受层数上限与循环检测约束"""
+        parent_key = os.path.normcase(os.path.abspath(parent.main_path))
+        with self._stats_lock:
+            depth = self._depths.get(parent_key, 0) + 1
+        parent_fp = _fingerprint(parent.main_path)
+        if parent_fp:
+            with self._stats_lock:
+                self._seen_fingerprints.add(parent_fp)
+        max_depth = int(cfg.get("recursive_depth", 3))
+        fname = os.path.basename(parent.main_path)
+        if depth > max_depth:
+            self.log_callback(f"⚠️ 嵌套超过 {max_depth} 层，不再继续解压: {fname}", "warn")
+            return
+        # 外层压缩包的密码通常也适用于内层
+        if pwd:
+            self.password_pool.add(pwd, dest)
+
+        by_dir = {}
+        for path, size in nested:
+            by_dir.setdefault(os.path.dirname(path), []).append((path, size))
+        added = 0
+        for files in by_dir.values():
+            for vset in sorted(group_volumes(files), key=lambda v: (-v.total_size, v.key)):
+                if vset.orphan:
+                    continue
+                if not vset.complete:
+                    self.log_callback(f"⚠️ 嵌套分卷不完整，跳过: {os.path.basename(vset.key)}", "warn")
+                    continue
+                fp = _fingerprint(vset.main_path)
+                with self._stats_lock:
+                    if fp and fp in self._seen_fingerprints:
+                        cycle = True
+                    else:
+                        cycle = False
+                        if fp:
+                            self._seen_fingerprints.add(fp)
+                if cycle:
+                    self.log_callback(f"🔁 检测到循环嵌套，跳过: {os.path.basename(vset.main_path)}", "warn")
+                    continue
+                if not self._claim_path(vset.main_path):
+                    continue
+                with self._stats_lock:
+                    self._depths[os.path.normcase(os.path.abspath(vset.main_path))] = depth
+                    self.stats["total"] += 1
+                self._scheduler.push((vset, cfg), vset.total_size, self._task_devices(vset, cfg))
+                added += 1
+        if added:
+            self.log_callback(f"📦 {fname} 内含 {added} 个压缩包，加入队列 (第 {depth} 层)", "info")
+            with self._pending_cond:
+                self._pending_cond.notify_all()
+
+    def _delete_sources(self, vset: VolumeSet, cfg: dict):
+        """解压成功后删除源文件：默认删除整组分卷，delete_whole_set=False 时只删首卷"""
+        targets = vset.parts if cfg.get("delete_whole_set", True) else [vset.main_path]
+        for p in targets:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def _find_password(self, backend: ExtractBackend, fpath: str, candidates: List[str],
+                       metric: ArchiveMetric, lead: int = 0) -> Optional[str]:
+        """
+        测试模式校验候选密码，返回通过的密码。
+        并行模式下前 lead 个 (已验证过、大概率正确) 先逐个单独测试，都不对才把其余候选并发测试，
+        否则诱饵密码会占满窗口，正确密码较慢的测试完成前它们都会被计入尝试
+        """
+        parallel = self._pwd_executor is not None and len(candidates) - lead > 1
+        for pwd in (candidates[:lead] if parallel else candidates):
+            if self._stop_event.is_set():
+                return None
+            metric.attempts += 1
+            if backend.test_password(fpath, pwd):
+                return pwd
+        if parallel:
+            return self._find_password_parallel(backend, fpath, candidates[lead:], metric)
+        return None
+
+    def _find_password_parallel(self, backend: ExtractBackend, fpath: str, candidates: List[str],
+                                metric: ArchiveMetric) -> Optional[str]:
+        """
+        在子线程池中并发测试候选密码 (滑动窗口提交)。
+        任一密码通过即取消其余排队中的尝试，并结束已在运行的测试进程 (同一尝试组)，
+        避免它们与随后的真正解压争抢磁盘与 CPU；尚未开始的尝试检查 found 后直接放弃。
+        """
+        found = threading.Event()
+        group = self._control.new_group()
+        pending = iter(candidates)
+        inflight = {}
+
+        def _test(pwd: str) -> Optional[bool]:
+            # None 表示已放弃、未实际测试 (不计入尝试次数)
+            if found.is_set() or self._stop_event.is_set():
+                return None
+            with group.bind():
+                ok = backend.test_password(fpath, pwd)
+            if group.cancelled:
+                return None
+            if ok:
+                found.set()
                 return True
-        self.log_callback(f"❌ 失败: {fname}", "error")
-        return False
+            return False
 
-    def _execute_unpack(self, fpath: str, cfg: dict, pwd: str) -> bool:
+        def _fill():
+            while len(inflight) < self._pwd_window and not found.is_set():
+                pwd = next(pending, None)
+                if pwd is None:
+                    return
+                inflight[self._pwd_executor.submit(_test, pwd)] = pwd
+
+        _fill()
+        try:
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    pwd = inflight.pop(fut)
+                    result = None if fut.cancelled() else fut.result()
+                    if result is not None:
+                        metric.attempts += 1
+                    if result:
+                        return pwd
+                if self._stop_event.is_set():
+                    return None
+                _fill()
+            return None
+        finally:
+            found.set()
+            for fut in inflight:
+                fut.cancel()
+            group.cancel()
+
+    def _resolve_dest(self, fpath: str, cfg: dict) -> str:
         fname = os.path.basename(fpath)
         fdir = os.path.dirname(fpath)
 
@@ -240,8 +963,8 @@ class UnpackEngine:
             base = os.path.splitext(base)[0]
         # ====================
 
-        mode = cfg['output_mode']
-        cpath = cfg['custom_output_path']
+        mode = cfg.get('output_mode', "current")
+        cpath = cfg.get('custom_output_path', "")
         dest = fdir
 
         if mode == "current_smart":
@@ -250,27 +973,55 @@ class UnpackEngine:
             dest = cpath if cpath else fdir
         elif mode == "custom_smart":
             dest = os.path.join(cpath, base) if cpath else fdir
+        return dest
 
-        if not os.path.exists(dest):
-            try:
-                os.makedirs(dest)
-            except OSError:
-                pass
-
-        cmd = [cfg['engine_path'], "x", "-y"]
-
-        if "WinRAR" in cfg['engine']:
-            # WinRAR 只要给第一个分卷，它会自动处理后续的
-            cmd.extend(["-ibck", fpath, dest + os.sep, f"-p{pwd}" if pwd else "-p-"])
-        else:
-            # Bandizip 逻辑类似
-            cmd.extend([f"-o:{dest}", fpath])
-            if pwd:
-                cmd.append(f"-p:{pwd}")
+    def _execute_unpack(self, backend: ExtractBackend, fpath: str, dest: str, pwd: str,
+                        nested: Optional[List[Tuple[str, int]]] = None,
+                        outputs: Optional[List[str]] = None) -> bool:
+        """
+        nested 不为 None 时，填入本次解压出的压缩包 / 分卷 [(最终路径, 大小)]；
+        outputs 不为 None 时，填入解压出的顶层条目 (最终路径)
+        """
+        if not self._cfg.get("atomic_extract", True):
+            if not os.path.exists(dest):
+                try:
+                    os.makedirs(dest)
+                except OSError:
+                    pass
+            before = set(os.listdir(dest)) if outputs is not None and os.path.isdir(dest) else set()
+            if not backend.extract(fpath, dest, pwd):
+                return False
+            if outputs is not None:
+                # 只能识别新增的条目；覆盖已有文件时无从得知
+                try:
+                    outputs.extend(os.path.join(dest, n) for n in sorted(set(os.listdir(dest)) - before))
+                except OSError:
+                    pass
+            return True
 
+        # 先解压到同一文件系统上的临时目录，成功后再原子改名 / 移入目标目录，
+        # 中断时目标目录里不会留下解压了一半的内容
+        staging = staging_dir_for(fpath, dest)
+        discard_staging(staging)
         try:
-            si = subprocess.STARTUPINFO()
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si).returncode == 0
-        except Exception:
-            return False
\ No newline at end of file
+            os.makedirs(staging)
+        except OSError:
+            return False
+        if self.journal is not None:
+            self.journal.started(fpath, staging)
+        if not backend.extract(fpath, staging, pwd) or self._stop_event.is_set():
+            discard_staging(staging)
+            return False
+        if nested is not None:
+            nested.extend((os.path.join(dest, rel), size) for rel, size in self._list_archives(staging))
+        # 目标目录不存在时临时目录整体改名为 dest
+        produced = [os.path.join(dest, n) for n in sorted(os.listdir(staging))] if os.path.isdir(dest) else [dest]
+        try:
+            commit_staging(staging, dest)
+            if outputs is not None:
+                outputs.extend(produced)
+            return True
+        except OSError as e:
+            self.log_callback(f"❌ 移动到目标目录失败: {os.path.basename(fpath)} ({e})", "error")
+            discard_staging(staging)
+            return False
@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Optional
+
+
+class UnpackIndex:
+    """
+    解压记录索引 (SQLite)。
+    按 路径 + 大小 + mtime 判断压缩包是否变化，记录每个压缩包的结果、可用密码、解压目标与解压出的顶层条目，
+    重复运行时可跳过已成功、未变化、目标未改且解压结果仍在的压缩包。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # 多个解压线程共用一个连接，由 _lock 串行化
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS archives ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime REAL NOT NULL,"
+            " status TEXT NOT NULL,"
+            " password TEXT,"
+            " updated REAL NOT NULL)"
+        )
+        # 旧版本的索引没有目标目录 / 解压结果两列
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(archives)")}
+        for name in ("dest", "outputs"):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE archives ADD COLUMN {name} TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[dict]:
+        """返回未变化文件的记录；文件不在索引中或大小/mtime 已变化时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, status, password, dest, outputs FROM archives WHERE path = ?",
+                (self._key(path),)
+            ).fetchone()
+        if not row:
+            return None
+        size, mtime, status, password, dest, outputs = row
+        if size != st.st_size or abs(mtime - st.st_mtime) > 1e-6:
+            return None
+        try:
+            outputs = json.loads(outputs) if outputs else []
+        except ValueError:
+            outputs = []
+        return {"status": status, "password": password, "dest": dest, "outputs": outputs}
+
+    def should_skip(self, path: str, st: os.stat_result, dest: str) -> bool:
+        """
+        已成功且未变化，且上次解压到同一目标、解压出的内容仍然存在。
+        没有记录解压结果时 (如关闭 atomic_extract 覆盖了已有文件)，只有目标是独立目录才以其存在为准
+        """
+        rec = self.lookup(path, st)
+        if rec is None or rec["status"] != "success" or rec["dest"] != self._key(dest):
+            return False
+        if rec["outputs"]:
+            return all(os.path.lexists(p) for p in rec["outputs"])
+        return self._key(dest) != self._key(os.path.dirname(path)) and os.path.isdir(dest)
+
+    def record(self, path: str, st: os.stat_result, status: str, password: Optional[str] = None,
+               dest: Optional[str] = None, outputs: Optional[List[str]] = None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO archives (path, size, mtime, status, password, updated, dest, outputs) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(path), st.st_size, st.st_mtime, status, password, time.time(),
+                 self._key(dest) if dest else None, json.dumps(outputs or [], ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
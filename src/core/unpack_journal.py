@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+# 解压中的临时目录前缀：完成后整体改名 / 移入目标目录，崩溃时残留的目录可据此识别
+STAGING_PREFIX = ".unpacking-"
+
+
+class UnpackJournal:
+    """
+    一次解压运行的预写日志 (JSON Lines，每条记录写入后立即 fsync)。
+    - start: 开始落盘解压 (记录临时目录)
+    - success / fail: 该压缩包已处理完毕
+    运行被中断 (关闭程序、断电) 后，以相同参数再次运行会读取日志，跳过已成功的压缩包 (失败的重新尝试)，
+    并清理中断时残留的临时目录；整批正常结束后日志文件被删除。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # 规范化路径 -> 最后一条记录
+        self._state: Dict[str, dict] = {}
+        self._replay()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fh = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def path_for(journal_dir: str, cfg: dict) -> str:
+        """同一源目录 + 输出设置对应同一个日志文件"""
+        key = "|".join([os.path.normcase(os.path.abspath(cfg.get("source_folder", ""))),
+                        cfg.get("output_mode", ""), cfg.get("custom_output_path", "")])
+        return os.path.join(journal_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".jsonl")
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 断电时最后一行可能只写了一半
+                        continue
+                    if isinstance(rec, dict) and "path" in rec:
+                        self._state[self._key(rec["path"])] = rec
+        except (IOError, OSError):
+            self._state = {}
+
+    def _write(self, rec: dict):
+        rec["ts"] = time.time()
+        with self._lock:
+            self._state[self._key(rec["path"])] = rec
+            self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def is_empty(self) -> bool:
+        """没有上次运行留下的记录 (不定义 __len__，避免空日志在 if journal: 中被当作 False)"""
+        with self._lock:
+            return not self._state
+
+    def started(self, path: str, staging: str):
+        self._write({"event": "start", "path": path, "staging": staging})
+
+    def finished(self, path: str, st: Optional[os.stat_result], status: str):
+        self._write({"event": status, "path": path,
+                     "size": st.st_size if st else None, "mtime": st.st_mtime if st else None})
+
+    def is_finished(self, path: str, st: os.stat_result) -> bool:
+        """
+        上次运行中已成功解压且文件未变化。
+        失败的不算：续传时可能已有新密码，且日志在整批结束后删除，此处跳过就再也没有重试机会
+        """
+        with self._lock:
+            rec = self._state.get(self._key(path))
+        return (rec is not None and rec["event"] == "success"
+                and rec.get("size") == st.st_size and abs((rec.get("mtime") or 0) - st.st_mtime) <= 1e-6)
+
+    def finished_count(self) -> int:
+        with self._lock:
+            return sum(1 for rec in self._state.values() if rec["event"] == "success")
+
+    def interrupted_staging(self) -> List[str]:
+        """上次运行中开始解压但没有结束的临时目录"""
+        with self._lock:
+            return [rec["staging"] for rec in self._state.values()
+                    if rec["event"] == "start" and rec.get("staging")]
+
+    def close(self, completed: bool):
+        """completed=True 表示整批已处理完，日志不再需要"""
+        with self._lock:
+            self._fh.close()
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def staging_dir_for(fpath: str, dest: str) -> str:
+    """
+    与目标目录位于同一文件系统的临时目录，完成后可原子改名：
+    目标目录尚不存在时放在其上级目录 (整体 rename 为 dest)，否则放在目标目录内 (逐项移入)。
+    """
+    tag = STAGING_PREFIX + hashlib.sha1(os.path.normcase(os.path.abspath(fpath)).encode("utf-8")).hexdigest()[:12]
+    if os.path.isdir(dest):
+        return os.path.join(dest, tag)
+    return os.path.join(os.path.dirname(os.path.abspath(dest)), tag)
+
+
+def commit_staging(staging: str, dest: str):
+    """把解压完成的临时目录提交到目标位置"""
+    if not os.path.exists(dest):
+        try:
+            os.replace(staging, dest)
+            return
+        except OSError:
+            # 并发的同名任务抢先创建了目标目录，退回逐项合并
+            if not os.path.isdir(dest):
+                raise
+    _merge_tree(staging, dest)
+    os.rmdir(staging)
+
+
+def _merge_tree(src: str, dst: str):
+    # 与外部工具的 -y 一致：同名文件覆盖，同名目录合并
+    with os.scandir(src) as it:
+        entries = list(it)
+    for entry in entries:
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir(follow_symlinks=False) and os.path.isdir(target) and not os.path.islink(target):
+            _merge_tree(entry.path, target)
+            os.rmdir(entry.path)
+            continue
+        if os.path.isdir(target) and not os.path.islink(target):
+            shutil.rmtree(target)
+        os.replace(entry.path, target)
+
+
+def discard_staging(staging: str):
+    shutil.rmtree(staging, ignore_errors=True)
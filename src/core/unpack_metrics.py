@@ -0,0 +1,111 @@
+import os
+import csv
+import json
+import threading
+from typing import Dict, List, Optional
+
+
+class ArchiveMetric:
+    """单个压缩包 (分卷组) 的处理记录，时间单位为秒"""
+    __slots__ = ("path", "size", "parts", "backend", "status", "attempts",
+                 "wait_time", "password_time", "extract_time", "total_time")
+
+    FIELDS = __slots__
+
+    def __init__(self, path: str, size: int, parts: int):
+        self.path = path
+        self.size = size
+        self.parts = parts
+        self.backend = ""
+        # success / fail / stopped
+        self.status = ""
+        # 实际执行的密码测试次数 (含延迟重试前的尝试)
+        self.attempts = 0
+        # 等待本目录说明文件解析完成的时间
+        self.wait_time = 0.0
+        # 从开始试密码到找到正确密码的时间
+        self.password_time = 0.0
+        # 真正解压 (落盘) 的耗时，测试通过但解压失败的也计入
+        self.extract_time = 0.0
+        self.total_time = 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.size / self.extract_time if self.extract_time > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        d = {k: getattr(self, k) for k in self.FIELDS}
+        for k in ("wait_time", "password_time", "extract_time", "total_time"):
+            d[k] = round(d[k], 4)
+        d["bytes_per_sec"] = round(self.bytes_per_sec, 1)
+        return d
+
+
+class MetricsRecorder:
+    """线程安全地收集一次运行中所有压缩包的记录，运行结束后汇总并导出 CSV / JSON"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: List[ArchiveMetric] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def add(self, metric: ArchiveMetric):
+        with self._lock:
+            self._records.append(metric)
+
+    def records(self) -> List[ArchiveMetric]:
+        with self._lock:
+            return list(self._records)
+
+    def summary(self, wall_time: float = 0.0, top: int = 5) -> dict:
+        records = self.records()
+        ok = [r for r in records if r.status == "success"]
+        total_bytes = sum(r.size for r in ok)
+        extract_time = sum(r.extract_time for r in ok)
+        by_backend: Dict[str, dict] = {}
+        for r in ok:
+            b = by_backend.setdefault(r.backend or "-", {"count": 0, "bytes": 0, "extract_time": 0.0})
+            b["count"] += 1
+            b["bytes"] += r.size
+            b["extract_time"] += r.extract_time
+        for b in by_backend.values():
+            b["bytes_per_sec"] = round(b["bytes"] / b["extract_time"], 1) if b["extract_time"] > 0 else 0.0
+            b["extract_time"] = round(b["extract_time"], 4)
+        slowest = sorted(records, key=lambda r: r.total_time, reverse=True)[:top]
+        return {
+            "archives": len(records),
+            "success": len(ok),
+            "fail": sum(1 for r in records if r.status == "fail"),
+            "bytes": total_bytes,
+            "wall_time": round(wall_time, 4),
+            # 整批吞吐 (含并发) 与单个解压任务的平均吞吐
+            "throughput": round(total_bytes / wall_time, 1) if wall_time > 0 else 0.0,
+            "extract_throughput": round(total_bytes / extract_time, 1) if extract_time > 0 else 0.0,
+            "attempts": sum(r.attempts for r in records),
+            "avg_password_time": round(sum(r.password_time for r in ok) / len(ok), 4) if ok else 0.0,
+            "by_backend": by_backend,
+            "slowest": [{"path": r.path, "total_time": round(r.total_time, 4)} for r in slowest],
+        }
+
+    def export(self, path: str, wall_time: float = 0.0) -> Optional[str]:
+        """按扩展名导出：.csv 为逐个压缩包的表格，其余为 {"summary", "archives"} JSON。返回错误信息或 None"""
+        try:
+            folder = os.path.dirname(os.path.abspath(path))
+            os.makedirs(folder, exist_ok=True)
+            rows = [r.as_dict() for r in self.records()]
+            if path.lower().endswith(".csv"):
+                # utf-8-sig：Excel 打开中文路径不乱码
+                with open(path, "w", newline="", encoding="utf-8-sig") as f:
+                    writer = csv.DictWriter(f, fieldnames=list(ArchiveMetric.FIELDS) + ["bytes_per_sec"])
+                    writer.writeheader()
+                    writer.writerows(rows)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({"summary": self.summary(wall_time), "archives": rows}, f,
+                              indent=4, ensure_ascii=False)
+            return None
+        except (IOError, OSError) as e:
+            return str(e)
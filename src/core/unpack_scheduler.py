@@ -0,0 +1,142 @@
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+
+class UnpackScheduler:
+    """
+    待解压任务队列 (线程安全)。
+    - 按压缩包 (分卷组) 总大小从大到小出队：大任务先开工，小任务填补空闲线程，
+      即 LPT 调度，可明显缩短整批任务的完成时间。
+    - 每个任务关联其源/目标所在的物理设备，出队时保证每个设备上同时进行的任务数
+      不超过 device_limit(dev)，避免同一块机械硬盘被多路读写拖慢。
+    - 暂时放不下 (目标空间不足) 的任务可以 park 搁置，不计入队列长度，unpark 后重新参与调度。
+    """
+
+    def __init__(self, device_limit: Optional[Callable[[int], int]] = None):
+        self._lock = threading.Lock()
+        self._device_limit = device_limit
+        # 设备组 (frozenset of st_dev) -> 该组的任务堆
+        self._heaps: Dict[FrozenSet[int], list] = {}
+        self._active: Dict[int, int] = {}
+        self._size = 0
+        self._parked: list = []
+        # 相同大小时按入队顺序出队
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    def push(self, task: tuple, size: int, devices: FrozenSet[int] = frozenset()):
+        with self._lock:
+            heapq.heappush(self._heaps.setdefault(devices, []), (-size, next(self._seq), task))
+            self._size += 1
+
+    def _has_capacity(self, devices: FrozenSet[int]) -> bool:
+        if self._device_limit is None:
+            return True
+        return all(self._active.get(d, 0) < self._device_limit(d) for d in devices)
+
+    def pop(self) -> Optional[Tuple[tuple, FrozenSet[int]]]:
+        """
+        取出设备有空闲配额的任务中最大的一个，返回 (task, devices)；
+        全部设备都已满载 (或队列为空) 时返回 None。任务结束后须调用 release(devices)。
+        """
+        with self._lock:
+            best = None
+            for devices, heap in self._heaps.items():
+                if heap and self._has_capacity(devices) and (best is None or heap[0] < self._heaps[best][0]):
+                    best = devices
+            if best is None:
+                return None
+            task = heapq.heappop(self._heaps[best])[2]
+            if not self._heaps[best]:
+                del self._heaps[best]
+            self._size -= 1
+            for d in best:
+                self._active[d] = self._active.get(d, 0) + 1
+            return task, best
+
+    def release(self, devices: FrozenSet[int]):
+        with self._lock:
+            for d in devices:
+                self._active[d] = max(0, self._active.get(d, 0) - 1)
+
+    @property
+    def parked(self) -> int:
+        with self._lock:
+            return len(self._parked)
+
+    def park(self, task: tuple, size: int, devices: FrozenSet[int] = frozenset()):
+        with self._lock:
+            self._parked.append((task, size, devices))
+
+    def unpark(self) -> int:
+        """搁置的任务全部放回队列，返回数量"""
+        with self._lock:
+            parked, self._parked = self._parked, []
+        for task, size, devices in parked:
+            self.push(task, size, devices)
+        return len(parked)
+
+
+class AdaptiveConcurrency:
+    """
+    爬山法自适应并发 (线程安全)。
+    按固定时间窗口统计处理的字节数得到吞吐；吞吐上升则沿当前方向继续加/减并发，
+    下降则反向，最终在当前机器与磁盘的吞吐峰值附近小幅振荡。
+    """
+
+    def __init__(self, start: int, lo: int, hi: int, window: float = 5.0, tolerance: float = 0.05):
+        self.lo = lo
+        self.hi = hi
+        self.window = window
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._limit = max(lo, min(hi, start))
+        self._direction = 1
+        self._bytes = 0
+        self._window_start = time.monotonic()
+        self._prev_rate = None
+        self.best = (self._limit, 0.0)
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return self._limit
+
+    def add_bytes(self, n: int):
+        with self._lock:
+            self._bytes += n
+
+    def tick(self, saturated: bool = True) -> Optional[Tuple[int, int, float]]:
+        """
+        窗口结束时评估一次，并发数有变化时返回 (旧值, 新值, 本窗口吞吐 B/s)。
+        saturated=False 表示任务不足以占满当前并发，此时的吞吐不能说明并发数的好坏，只重置窗口。
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.window:
+                return None
+            rate = self._bytes / elapsed
+            self._bytes = 0
+            self._window_start = now
+            if not saturated:
+                return None
+            if rate > self.best[1]:
+                self.best = (self._limit, rate)
+            if self._prev_rate is not None and rate < self._prev_rate * (1 - self.tolerance):
+                # 吞吐下降：上一步方向错了，掉头
+                self._direction = -self._direction
+            self._prev_rate = rate
+            old = self._limit
+            new = old + self._direction
+            if new < self.lo or new > self.hi:
+                self._direction = -self._direction
+                new = old + self._direction
+            self._limit = max(self.lo, min(self.hi, new))
+            return (old, self._limit, rate) if self._limit != old else None
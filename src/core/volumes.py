@@ -0,0 +1,210 @@
+import io
+import os
+import re
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+# 分卷命名规则 (小写匹配)：
+#   name.part1.rar / name.part01.rar  -> RAR 新式分卷，编号从 1 开始
+#   name.rar + name.r00, name.r01 ... -> RAR 旧式分卷，.rar 为首卷，编号从 00 开始
+#   name.zip + name.z01, name.z02 ... -> ZIP 分卷，.zip 为末卷但解压入口，编号从 01 开始
+#   name.7z.001, name.7z.002 ...      -> 按字节切分的分卷，编号从 001 开始
+_RE_RAR_PART = re.compile(r'^(?P<base>.+)\.part(?P<num>\d+)\.rar$')
+_RE_OLD_STYLE = re.compile(r'^(?P<base>.+)\.(?P<kind>[zr])(?P<num>\d{2,})$')
+_RE_SPLIT = re.compile(r'^(?P<base>.+)\.(?P<num>\d{3})$')
+
+
+class VolumeSet:
+    """一个压缩包的全部分卷 (单文件压缩包即只有一卷的集合)"""
+    __slots__ = ("key", "main_path", "parts", "total_size", "missing")
+
+    def __init__(self, key: str, main_path: Optional[str], parts: List[str], total_size: int,
+                 missing: List[str]):
+        self.key = key
+        # 交给解压工具的入口文件 (首卷)；缺少首卷时为 None
+        self.main_path = main_path
+        self.parts = parts
+        self.total_size = total_size
+        self.missing = missing
+
+    @property
+    def complete(self) -> bool:
+        return self.main_path is not None and not self.missing
+
+    @property
+    def orphan(self) -> bool:
+        """
+        没有入口卷 (.001 / .part1.rar / .rar / .zip)：可能只是扩展名恰好形如 .002 / .r10 的普通文件，
+        不能当作缺卷的压缩包判失败
+        """
+        return self.main_path is None
+
+    @property
+    def is_multi(self) -> bool:
+        return len(self.parts) > 1
+
+    def __repr__(self):
+        return f"VolumeSet({self.key!r}, parts={len(self.parts)}, size={self.total_size})"
+
+
+def is_volume_name(name: str) -> bool:
+    """是否为分卷的非首卷文件 (.z01 / .r00 / .002 等)，扫描时需要收集以便分组"""
+    name_lower = name.lower()
+    m = _RE_SPLIT.match(name_lower)
+    if m:
+        return int(m.group("num")) > 1
+    return _RE_OLD_STYLE.match(name_lower) is not None
+
+
+def group_volumes(files: List[Tuple[str, int]]) -> List[VolumeSet]:
+    """
+    将同一目录下的压缩包文件 [(路径, 大小)] 按分卷规则分组。
+    能检测编号中间缺卷及缺少首卷；末尾缺卷 (不知道总卷数) 无法仅凭文件名判断。
+    """
+    # key -> {"style", "main", "nums": {编号: (路径, 大小)}}
+    groups: Dict[str, dict] = {}
+    singles: List[VolumeSet] = []
+
+    def _group(key: str, style: str) -> dict:
+        return groups.setdefault(key, {"style": style, "main": None, "nums": {}})
+
+    for path, size in files:
+        name_lower = os.path.basename(path).lower()
+        dirname = os.path.dirname(path)
+
+        m = _RE_RAR_PART.match(name_lower)
+        if m:
+            g = _group(os.path.join(dirname, m.group("base")) + ".part#.rar", "part")
+            g["nums"][int(m.group("num"))] = (path, size)
+            continue
+
+        m = _RE_OLD_STYLE.match(name_lower)
+        if m:
+            ext = ".zip" if m.group("kind") == "z" else ".rar"
+            g = _group(os.path.join(dirname, m.group("base")) + ext, "old_" + m.group("kind"))
+            g["nums"][int(m.group("num"))] = (path, size)
+            continue
+
+        m = _RE_SPLIT.match(name_lower)
+        if m:
+            g = _group(os.path.join(dirname, m.group("base")) + ".###", "split")
+            g["nums"][int(m.group("num"))] = (path, size)
+            continue
+
+        if name_lower.endswith((".zip", ".rar")):
+            key = os.path.join(dirname, name_lower)
+            # .zip / .rar 可能是旧式分卷的入口卷，先挂到分组上
+            g = _group(key, "old_z" if name_lower.endswith(".zip") else "old_r")
+            g["main"] = (path, size)
+            continue
+
+        singles.append(VolumeSet(path, path, [path], size, []))
+
+    for key, g in groups.items():
+        nums = g["nums"]
+        style = g["style"]
+        if style.startswith("old_") and not nums:
+            # 普通的单个 .zip / .rar
+            path, size = g["main"]
+            singles.append(VolumeSet(path, path, [path], size, []))
+            continue
+
+        first = {"part": 1, "old_r": 0, "old_z": 1, "split": 1}[style]
+        expected = range(first, max(nums) + 1) if nums else range(0)
+        missing = [str(n) for n in expected if n not in nums]
+        ordered = [nums[n] for n in sorted(nums)]
+
+        if style in ("old_r", "old_z"):
+            # 旧式分卷：入口为 .rar / .zip 本身
+            main = g["main"]
+            if main is None:
+                missing.insert(0, "rar" if style == "old_r" else "zip")
+            # RAR: .rar, .r00, .r01 ... ; ZIP: .z01, .z02 ... , .zip (末卷)
+            ordered = ([main] + ordered if style == "old_r" else ordered + [main]) if main else ordered
+            main_path = main[0] if main else None
+        else:
+            main_path = nums[first][0] if first in nums else None
+
+        paths = [p for p, _ in ordered]
+        total = sum(s for _, s in ordered)
+        singles.append(VolumeSet(main_path or paths[0], main_path, paths, total, missing))
+
+    return singles
+
+
+def split_volume_parts(fpath: str) -> List[str]:
+    """name.ext.001 -> [name.ext.001, name.ext.002, ...] (按字节切分的分卷，遇到缺号即停止)"""
+    m = _RE_SPLIT.match(fpath.lower())
+    if not m:
+        return [fpath]
+    stem = fpath[:-4]
+    parts = []
+    n = int(m.group("num"))
+    while True:
+        p = f"{stem}.{n:03d}"
+        if not os.path.exists(p):
+            break
+        parts.append(p)
+        n += 1
+    return parts or [fpath]
+
+
+class ConcatReader(io.RawIOBase):
+    """把多个按字节切分的分卷拼接成一个只读、可 seek 的文件对象 (供 zipfile / tarfile 直接读取)"""
+
+    def __init__(self, paths: List[str]):
+        super().__init__()
+        self._paths = paths
+        self._sizes = [os.path.getsize(p) for p in paths]
+        self._offsets = []
+        off = 0
+        for s in self._sizes:
+            self._offsets.append(off)
+            off += s
+        self._size = off
+        self._pos = 0
+        self._idx = -1
+        self._fh = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        else:
+            pos = self._size + offset
+        self._pos = max(0, pos)
+        return self._pos
+
+    def _open_part(self, idx: int):
+        if idx != self._idx:
+            if self._fh:
+                self._fh.close()
+            self._fh = open(self._paths[idx], "rb")
+            self._idx = idx
+
+    def readinto(self, b) -> int:
+        if self._pos >= self._size:
+            return 0
+        idx = bisect.bisect_right(self._offsets, self._pos) - 1
+        self._open_part(idx)
+        local = self._pos - self._offsets[idx]
+        self._fh.seek(local)
+        n = self._fh.readinto(memoryview(b)[:min(len(b), self._sizes[idx] - local)])
+        self._pos += n
+        return n
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        super().close()
@@ -1,10 +1,12 @@
 import os
+import threading
 import tkinter as tk
 from tkinter import filedialog, Listbox, ttk, messagebox
 from datetime import datetime
 import customtkinter as ctk
 from PIL import Image
 from src.gui.prompt_panel import PromptPanel
+from src.gui.event_queue import UiEventQueue
 
 # === 设置窗口图标 (防止开发环境报错) ===
 try:
@@ -15,12 +17,16 @@ except:
 
 # === 引入各模块 ===
 from src.config.manager import ConfigManager
-from src.core.unpack_engine import UnpackEngine
+from src.core.unpack_engine import UnpackEngine, OUTPUT_MODES
 from src.core.icon_engine import IconEngine
 from src.core.json_engine import JsonEngine
 
 
 class App(ctk.CTk):
+    # 事件泵：每 50ms 处理一批引擎事件，单次最多 2000 个，避免日志洪峰卡死界面
+    PUMP_INTERVAL_MS = 50
+    PUMP_BUDGET = 2000
+
     def __init__(self):
         super().__init__()
         self.title("全能工具箱")
@@ -31,7 +37,8 @@ class App(ctk.CTk):
         self.cfg_mgr = ConfigManager()
         self.config = self.cfg_mgr.load_config()
 
-        # 2. 初始化各引擎
+        # 2. 初始化各引擎 (回调统一写入事件队列，由界面线程批量处理)
+        self.ui_events = UiEventQueue()
         self.unpacker = UnpackEngine(self.log_u, self.prog_u, self.fin_u)
         self.iconer = IconEngine(self.log_i, self.prog_i, self.fin_i)
         self.jsoner = JsonEngine(self.log_j)
@@ -47,6 +54,7 @@ class App(ctk.CTk):
 
         # 默认显示解压页
         self.switch_tab("unpack")
+        self.after(self.PUMP_INTERVAL_MS, self._pump_events)
 
     def _init_layout(self):
         self.grid_columnconfigure(1, weight=1)
@@ -161,9 +169,14 @@ class App(ctk.CTk):
         ctk.CTkButton(r2, text="📂", width=40, command=lambda: self._browse_dir(self.entry_u_dst)).pack(side="left",
                                                                                                        padx=5)
 
+        r3 = ctk.CTkFrame(cfg_box, fg_color="transparent")
+        r3.pack(fill="x", padx=5, pady=10)
         self.var_del = ctk.BooleanVar(value=self.config.get("delete_source", False))
-        ctk.CTkCheckBox(cfg_box, text="解压后删除源文件 (仅主文件)", variable=self.var_del).pack(anchor="w", padx=15,
-                                                                                                 pady=10)
+        ctk.CTkCheckBox(r3, text="解压后删除源文件 (含全部分卷)", variable=self.var_del).pack(side="left", padx=10)
+        self.var_recursive = ctk.BooleanVar(value=self.config.get("recursive_unpack", False))
+        ctk.CTkCheckBox(r3, text="继续解压包内的压缩包", variable=self.var_recursive).pack(side="left", padx=10)
+        self.var_index = ctk.BooleanVar(value=self.config.get("use_index", True))
+        ctk.CTkCheckBox(r3, text="跳过已解压且未变化的压缩包", variable=self.var_index).pack(side="left", padx=10)
 
         # 日志区
         self.txt_u_log = ctk.CTkTextbox(frame, font=("Consolas", 12))
@@ -190,16 +203,16 @@ class App(ctk.CTk):
             "last_unpack_src": self.entry_u_src.get(),
             "last_unpack_dst": self.entry_u_dst.get(),
             "last_output_mode": self.om_u_mode.get(),
-            "delete_source": self.var_del.get()
+            "delete_source": self.var_del.get(),
+            "recursive_unpack": self.var_recursive.get(),
+            "use_index": self.var_index.get()
         })
         self.cfg_mgr.save_config(self.config)
 
-        mode_map = {"当前目录(散)": "current", "当前+智能文件夹": "current_smart", "指定目录(混)": "custom_direct",
-                    "指定+智能文件夹": "custom_smart"}
         cfg = self.config.copy()
         cfg.update({
             "source_folder": self.entry_u_src.get(),
-            "output_mode": mode_map.get(self.om_u_mode.get(), "current"),
+            "output_mode": OUTPUT_MODES.get(self.om_u_mode.get(), "current"),
             "custom_output_path": self.entry_u_dst.get(),
             "engine_path": self.config["winrar_path"] if self.config["engine"] == "WinRAR" else self.config[
                 "bandizip_path"]
@@ -238,10 +251,10 @@ class App(ctk.CTk):
 
     # --- Callbacks ---
     def log_u(self, m, l):
-        self.after(0, lambda: self._log_insert(self.txt_u_log, m))
+        self.ui_events.log("unpack", f"[{datetime.now().strftime('%H:%M:%S')}] {m}")
 
     def prog_u(self, v):
-        self.after(0, lambda: self.bar_u.set(v))
+        self.ui_events.set("progress", "unpack", v)
 
     def fin_u(self, s, aborted=False):
         def _f():
@@ -249,12 +262,14 @@ class App(ctk.CTk):
             self._toggle_u_btns(False)
             self.bar_u.set(0 if aborted else 1.0)
             t = "已取消" if aborted else f"完成! 成功 {s['success']} / 失败 {s['fail']}"
+            if not aborted and s.get("skipped"):
+                t += f" / 跳过 {s['skipped']}"
             c = "#FF4D4D" if aborted else "#3B8ED0"
             self.lbl_u_status.configure(text=t, text_color=c)
             if not aborted:
                 self._log_insert(self.txt_u_log, "=" * 20 + "\n" + t)
 
-        self.after(0, _f)
+        self.ui_events.call(_f)
 
     # =========================================================================
     # Tab 2: 图片转 Icon
@@ -406,7 +421,9 @@ class App(ctk.CTk):
         if not self.icon_files: return
         self.btn_i_run.configure(state="disabled")
         self.iconer.start(self.icon_files, self.config["icon_output_path"],
-                          self.cb_size.get(), self.entry_i_cust.get(), self.var_crop.get())
+                          self.cb_size.get(), self.entry_i_cust.get(), self.var_crop.get(),
+                          int(self.config.get("icon_workers", 0)), self.config.get("icon_quality", "high"),
+                          int(self.config.get("icon_cache_mb", 0)), bool(self.config.get("icon_cache_link", False)))
 
     def _refresh_preview_list(self):
         out_dir = self.config["icon_output_path"]
@@ -464,10 +481,11 @@ class App(ctk.CTk):
             self.lbl_preview_img.place(relx=0.5, rely=0.5, anchor="center")
 
     def log_i(self, m, l):
-        self.after(0, lambda: self.lbl_i_status.configure(text=m))
+        # 状态栏只显示最新一条
+        self.ui_events.set("status", "icon", (m, None))
 
     def prog_i(self, v):
-        self.after(0, lambda: self.bar_i.set(v))
+        self.ui_events.set("progress", "icon", v)
 
     def fin_i(self, stats):
         def _f():
@@ -485,7 +503,7 @@ class App(ctk.CTk):
             elif stats["success"] > 0:
                 messagebox.showinfo("完成", f"成功转换 {stats['success']} 个图标")
 
-        self.after(0, _f)
+        self.ui_events.call(_f)
 
     # =========================================================================
     # Tab 3: JSON 工厂 (新版: 批量输入 + 智能解析)
@@ -625,8 +643,12 @@ class App(ctk.CTk):
 
     def log_j(self, msg, level="info"):
         color = "#2CC985" if level == "success" else "#FF4D4D" if level == "error" else "#3B8ED0"
-        self.lbl_j_status.configure(text=msg, text_color=color)
-        if level == "error": messagebox.showerror("错误", msg)
+        self.ui_events.set("status", "json", (msg, color))
+        if level == "error":
+            self.ui_events.call(lambda: messagebox.showerror("错误", msg))
+        # JSON 操作由界面线程同步触发，后续代码会读取状态栏，需立即生效
+        if threading.current_thread() is threading.main_thread():
+            self._process_events()
 
     def _render_tree(self, keep_state=True, force_open=None):
         """
@@ -813,9 +835,13 @@ class App(ctk.CTk):
 
         self._set_grp(frame, "解压引擎",
                       [("engine", "类型", ["WinRAR", "Bandizip"]), ("winrar_path", "WinRAR.exe", "file"),
-                       ("bandizip_path", "Bandizip.exe", "file"), ("max_workers", "线程数", None)])
+                       ("bandizip_path", "Bandizip.exe", "file"), ("max_workers", "线程数 (0=自动)", None),
+                       ("password_workers", "试密码线程", None)])
 
-        self._set_grp(frame, "图片转换", [("icon_output_path", "Icon输出位置", "dir")])
+        self._set_grp(frame, "图片转换", [("icon_output_path", "Icon输出位置", "dir"),
+                                          ("icon_workers", "转换进程数 (0=自动)", None),
+                                          ("icon_quality", "缩放质量", ["high", "medium", "low"]),
+                                          ("icon_cache_mb", "缓存上限 MB (0=关闭)", None)])
         # [新增] AI 抽卡机设置组
         self._set_grp(frame, "AI 提示词抽卡", [
             ("prompt_data_path", "Data 数据源目录", "dir"),
@@ -851,6 +877,7 @@ class App(ctk.CTk):
     def save_settings(self):
         self.config.update({
             "engine": self.v_engine.get(),
+            "icon_quality": self.v_icon_quality.get(),
             "winrar_path": self.e_winrar_path.get(),
             "bandizip_path": self.e_bandizip_path.get(),
             "icon_output_path": self.e_icon_output_path.get(),
@@ -863,6 +890,18 @@ class App(ctk.CTk):
             self.config["max_workers"] = int(self.e_max_workers.get())
         except:
             pass
+        try:
+            self.config["password_workers"] = int(self.e_password_workers.get())
+        except:
+            pass
+        try:
+            self.config["icon_workers"] = int(self.e_icon_workers.get())
+        except:
+            pass
+        try:
+            self.config["icon_cache_mb"] = int(self.e_icon_cache_mb.get())
+        except:
+            pass
         # 2. 持久化保存
         self.cfg_mgr.save_config(self.config)
 
@@ -891,11 +930,56 @@ class App(ctk.CTk):
 
     def _log_insert(self, txtbox, msg):
         t = datetime.now().strftime("%H:%M:%S")
+        self._log_insert_lines(txtbox, [f"[{t}] {msg}"])
+
+    def _log_insert_lines(self, txtbox, lines):
+        """一次插入多行并滚动到底部；超过 gui_log_max_lines 时删除最早的行"""
         txtbox.configure(state="normal")
-        txtbox.insert("end", f"[{t}] {msg}\n")
+        txtbox.insert("end", "\n".join(lines) + "\n")
+        max_lines = int(self.config.get("gui_log_max_lines", 5000))
+        total = int(txtbox.index("end-1c").split(".")[0])
+        if max_lines > 0 and total > max_lines + 1:
+            txtbox.delete("1.0", f"{total - max_lines}.0")
         txtbox.see("end")
         txtbox.configure(state="disabled")
 
+    def _pump_events(self):
+        self._process_events()
+        self.after(self.PUMP_INTERVAL_MS, self._pump_events)
+
+    def _process_events(self):
+        """批量处理引擎事件：同一文本框的日志合并为一次插入，进度 / 状态只应用最新值"""
+        pending_lines = {}
+
+        def _flush_lines():
+            for channel, lines in pending_lines.items():
+                self._log_insert_lines(self._log_widget(channel), lines)
+            pending_lines.clear()
+
+        for ev in self.ui_events.drain(self.PUMP_BUDGET):
+            if ev[0] == "log":
+                pending_lines.setdefault(ev[1], []).append(ev[2])
+            elif ev[0] == "set":
+                self._apply_latest(ev[1], ev[2], ev[3])
+            else:
+                _flush_lines()
+                ev[1]()
+        _flush_lines()
+
+    def _log_widget(self, channel):
+        return {"unpack": self.txt_u_log}[channel]
+
+    def _apply_latest(self, kind, channel, value):
+        if kind == "progress":
+            {"unpack": self.bar_u, "icon": self.bar_i}[channel].set(value)
+        elif kind == "status":
+            text, color = value
+            label = {"icon": self.lbl_i_status, "json": self.lbl_j_status}[channel]
+            if color:
+                label.configure(text=text, text_color=color)
+            else:
+                label.configure(text=text)
+
     def _try_autosave(self):
         """尝试自动保存 (仅当文件路径存在时执行)"""
         # 如果当前有文件路径，则静默保存
@@ -0,0 +1,47 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class UiEventQueue:
+    """
+    引擎线程 -> 界面线程的事件队列 (线程安全)。
+    引擎回调只往队列里放事件，界面线程定时批量取出处理，避免每条日志都调度一次 after(0, ...)。
+    - log:  按顺序保留的日志行
+    - set:  进度 / 状态等只关心最新值的事件，同一 (类型, 频道) 只保留最后一次
+    - call: 需在界面线程执行的回调 (如任务完成)；它之前的日志与最新值会先被处理，保证顺序
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: deque = deque()
+        self._latest: Dict[Tuple[str, str], Any] = {}
+
+    def log(self, channel: str, text: str):
+        with self._lock:
+            self._events.append(("log", channel, text))
+
+    def set(self, kind: str, channel: str, value: Any):
+        with self._lock:
+            self._latest[(kind, channel)] = value
+
+    def call(self, fn: Callable[[], None]):
+        with self._lock:
+            self._flush_latest()
+            self._events.append(("call", fn))
+
+    def _flush_latest(self):
+        for (kind, channel), value in self._latest.items():
+            self._events.append(("set", kind, channel, value))
+        self._latest.clear()
+
+    def drain(self, budget: int) -> List[tuple]:
+        """取出最多 budget 个事件；队列取空时附带所有最新值"""
+        with self._lock:
+            n = min(budget, len(self._events))
+            batch = [self._events.popleft() for _ in range(n)]
+            if not self._events:
+                self._flush_latest()
+                batch.extend(self._events)
+                self._events.clear()
+            return batch
@@ -0,0 +1,90 @@
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+
+def existing_parent(path: str) -> Optional[str]:
+    """路径本身或最近的已存在上级目录"""
+    p = os.path.abspath(path)
+    while not os.path.exists(p):
+        parent = os.path.dirname(p)
+        if parent == p:
+            return None
+        p = parent
+    return p
+
+
+def device_of(path: str) -> Optional[int]:
+    """返回路径所在设备号 (st_dev)；路径尚不存在时取最近的已存在上级目录"""
+    p = existing_parent(path)
+    if p is None:
+        return None
+    try:
+        return os.stat(p).st_dev
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def is_rotational(dev: int) -> Optional[bool]:
+    """
+    设备是否为机械硬盘。
+    Linux 读取 /sys/dev/block/<major>:<minor> 下的 queue/rotational；
+    其他系统或无法判断时返回 None。
+    """
+    if not hasattr(os, "major"):
+        return None
+    base = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+    # 分区本身没有 queue 目录，需要看所属的整块磁盘
+    for candidate in (os.path.join(base, "queue", "rotational"),
+                      os.path.join(base, "..", "queue", "rotational")):
+        try:
+            with open(candidate, "r") as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+class SpaceLedger:
+    """
+    按卷 (st_dev) 记录进行中的解压已预留的空间 (线程安全)。
+    可用空间 = 当前剩余空间 - 其他任务尚未写完的预留 - 保留余量；放不下的任务不允许开始。
+    """
+
+    def __init__(self, margin: int = 0):
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._reserved: Dict[int, int] = {}
+        # 任务键 -> (设备号, 预留字节数)
+        self._holds: Dict[str, Tuple[int, int]] = {}
+
+    def reserve(self, key: str, path: str, need: int) -> bool:
+        """为写入 path 的任务预留 need 字节；空间不足返回 False"""
+        base = existing_parent(path)
+        if base is None:
+            return True
+        try:
+            dev = os.stat(base).st_dev
+            free = shutil.disk_usage(base).free
+        except OSError:
+            # 无法获取剩余空间时不做限制
+            return True
+        with self._lock:
+            if free - self._reserved.get(dev, 0) - self.margin < need:
+                return False
+            self._reserved[dev] = self._reserved.get(dev, 0) + need
+            self._holds[key] = (dev, need)
+            return True
+
+    def release(self, key: str) -> bool:
+        """任务结束 (数据已实际写入或已清理) 后释放预留，返回此前是否有预留"""
+        with self._lock:
+            hold = self._holds.pop(key, None)
+            if hold is None:
+                return False
+            dev, need = hold
+            self._reserved[dev] = max(0, self._reserved.get(dev, 0) - need)
+            return True
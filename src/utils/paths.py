@@ -4,10 +4,16 @@ import os
 def get_base_roots() -> dict:
     """
     获取基础路径配置，自动检测 D 盘或 C 盘。
+    非 Windows 系统 (如无界面的 Linux 服务器) 使用 ~/工具箱；可用环境变量 TOOLBOX_HOME 覆盖。
     """
-    # 检测盘符
-    drive = "D:\\" if os.path.exists("D:\\") else "C:\\"
-    base_tool_dir = os.path.join(drive, "工具箱")
+    if os.environ.get("TOOLBOX_HOME"):
+        base_tool_dir = os.environ["TOOLBOX_HOME"]
+    elif os.name == "nt":
+        # 检测盘符
+        drive = "D:\\" if os.path.exists("D:\\") else "C:\\"
+        base_tool_dir = os.path.join(drive, "工具箱")
+    else:
+        base_tool_dir = os.path.join(os.path.expanduser("~"), "工具箱")
 
     paths = {
         "config_dir": os.path.join(base_tool_dir, "config"),
@@ -0,0 +1,138 @@
+import os
+import glob
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    # 可选依赖：Linux 下有 inotify_simple 时由内核通知目录变化，否则定时轮询
+    from inotify_simple import INotify, flags as _iflags
+except ImportError:
+    INotify = None
+
+Signature = Tuple[int, int]
+
+
+def expand_inputs(inputs: Iterable[str], exts: Tuple[str, ...]) -> Tuple[List[Tuple[str, str]], Set[str]]:
+    """
+    把文件 / 文件夹 / 通配符展开为图片列表 [(路径, 相对子目录)] (按路径排序，去重)，
+    同时返回涉及的目录，供监视使用。文件夹会包含所有子目录；
+    相对子目录以输入的文件夹 (通配符则为其固定部分) 为起点，用于在输出目录下保留结构。
+    """
+    files: Dict[str, str] = {}
+    dirs: Set[str] = set()
+    for item in inputs:
+        matches = [item]
+        root = None
+        if glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+            # 通配符暂时匹配不到文件时，仍监视其固定部分所在的目录
+            base = item
+            while glob.has_magic(base):
+                base = os.path.dirname(base)
+            root = os.path.abspath(base or ".")
+            if os.path.isdir(root):
+                dirs.add(root)
+        for path in matches:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                for folder, _, names in os.walk(path):
+                    dirs.add(folder)
+                    rel = _relative_dir(folder, root or path)
+                    for n in names:
+                        if n.lower().endswith(exts):
+                            files.setdefault(os.path.join(folder, n), rel)
+            elif os.path.isfile(path) and path.lower().endswith(exts):
+                files.setdefault(path, _relative_dir(os.path.dirname(path), root) if root else "")
+                dirs.add(os.path.dirname(path))
+    return sorted(files.items()), dirs
+
+
+def _relative_dir(folder: str, root: str) -> str:
+    rel = os.path.relpath(folder, root)
+    return "" if rel == "." or rel.startswith("..") else rel
+
+
+def signature(path: str) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ChangeTracker:
+    """
+    记录每个文件上次处理时的 (修改时间, 大小)，找出新增或变化的文件。
+    新出现 / 刚变化的文件需在连续两次扫描中保持不变才算就绪，避免处理仍在写入 (复制中) 的文件。
+    """
+
+    def __init__(self):
+        self._done: Dict[str, Signature] = {}
+        self._last: Dict[str, Signature] = {}
+
+    def ready(self, files: Iterable[str], settle: bool = True) -> List[str]:
+        out = []
+        current: Dict[str, Signature] = {}
+        for path in files:
+            sig = signature(path)
+            if sig is None:
+                continue
+            current[path] = sig
+            if self._done.get(path) == sig:
+                continue
+            if not settle or self._last.get(path) == sig:
+                out.append(path)
+        self._last = current
+        return out
+
+    def mark_done(self, paths: Iterable[str]):
+        for path in paths:
+            sig = self._last.get(path)
+            if sig is not None:
+                self._done[path] = sig
+
+
+class FolderWatcher:
+    """等待目录变化：有 inotify 时事件到达即返回，否则 (或超时) 按轮询间隔返回"""
+
+    def __init__(self):
+        self._inotify = None
+        self._mask = 0
+        self._watched: Set[str] = set()
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                self._mask = (_iflags.CLOSE_WRITE | _iflags.MOVED_TO | _iflags.CREATE
+                              | _iflags.DELETE | _iflags.MOVED_FROM)
+            except OSError:
+                self._inotify = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def watch(self, dirs: Iterable[str]):
+        if self._inotify is None:
+            return
+        for d in dirs:
+            if d in self._watched:
+                continue
+            try:
+                self._inotify.add_watch(d, self._mask)
+                self._watched.add(d)
+            except OSError:
+                # 超出 max_user_watches 等：该目录仍由超时后的重新扫描覆盖
+                pass
+
+    def wait(self, timeout: float):
+        if self._inotify is None:
+            time.sleep(timeout)
+            return
+        if self._inotify.read(timeout=int(timeout * 1000)):
+            # 同一批复制操作通常产生一串事件，稍等片刻合并处理
+            time.sleep(0.2)
+            self._inotify.read(timeout=0)
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
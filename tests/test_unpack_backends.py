@@ -0,0 +1,132 @@
+import io
+import os
+import gzip
+import random
+import tarfile
+import zipfile
+import tempfile
+import unittest
+
+from benchmarks.unpack_bench import _split_file, _write_encrypted_zip
+from src.core.unpack_backends import BuiltinBackend, _parse_listing, _safe_join
+
+
+class SafeJoinTest(unittest.TestCase):
+    def test_rejects_traversal(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.assertIsNone(_safe_join(d, "../evil.txt"))
+            self.assertIsNone(_safe_join(d, "a/../../evil.txt"))
+            self.assertIsNone(_safe_join(d, "..\\evil.txt"))
+
+    def test_keeps_members_inside(self):
+        with tempfile.TemporaryDirectory() as d:
+            root = os.path.realpath(d)
+            self.assertEqual(_safe_join(d, "a/b.txt"), os.path.join(root, "a", "b.txt"))
+            # 绝对路径按相对路径处理
+            self.assertEqual(_safe_join(d, "/etc/x"), os.path.join(root, "etc", "x"))
+
+
+class BuiltinBackendTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        self.dest = os.path.join(self.dir, "out")
+        os.makedirs(self.dest)
+        self.backend = BuiltinBackend()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _zip(self, name: str, files: dict) -> str:
+        path = os.path.join(self.dir, name)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for member, data in files.items():
+                zf.writestr(member, data)
+        return path
+
+    def test_zip_slip_member_is_not_written_outside(self):
+        path = self._zip("slip.zip", {"../evil.txt": b"x", "ok/a.txt": b"hello"})
+        self.assertTrue(self.backend.extract(path, self.dest, ""))
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "evil.txt")))
+        with open(os.path.join(self.dest, "ok", "a.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"hello")
+
+    def test_tar_slip_member_is_not_written_outside(self):
+        path = os.path.join(self.dir, "slip.tar")
+        with tarfile.open(path, "w") as tf:
+            info = tarfile.TarInfo("../evil.txt")
+            info.size = 1
+            tf.addfile(info, io.BytesIO(b"x"))
+        self.backend.extract(path, self.dest, "")
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "evil.txt")))
+
+    def test_split_zip_is_read_across_volumes(self):
+        data = random.Random(1).randbytes(300_000)
+        path = self._zip("big.zip", {"blob.bin": data})
+        _split_file(path, 100_000)
+        first = path + ".001"
+        self.assertTrue(self.backend.supports(first))
+        self.assertEqual(self.backend.uncompressed_size(first), len(data))
+        self.assertTrue(self.backend.extract(first, self.dest, ""))
+        with open(os.path.join(self.dest, "blob.bin"), "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_gz_size_and_extract(self):
+        path = os.path.join(self.dir, "notes.txt.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(b"a" * 5000)
+        self.assertEqual(self.backend.uncompressed_size(path), 5000)
+        self.assertTrue(self.backend.extract(path, self.dest, ""))
+        self.assertEqual(os.path.getsize(os.path.join(self.dest, "notes.txt")), 5000)
+
+    def test_encrypted_zip_password_check(self):
+        path = os.path.join(self.dir, "enc.zip")
+        _write_encrypted_zip(path, {"s.bin": b"secret" * 100}, "right", random.Random(2))
+        self.assertTrue(self.backend.is_encrypted(path))
+        self.assertFalse(self.backend.test_password(path, "wrong"))
+        self.assertTrue(self.backend.test_password(path, "right"))
+        self.assertFalse(self.backend.extract(path, self.dest, "wrong"))
+        self.assertTrue(self.backend.extract(path, self.dest, "right"))
+
+    def test_spanned_zip_is_left_to_external_tools(self):
+        path = self._zip("arc.zip", {"a.txt": b"a"})
+        self.assertTrue(self.backend.supports(path))
+        # 同名 .z01 存在：zip -s 生成的跨卷集
+        open(os.path.join(self.dir, "arc.z01"), "wb").close()
+        self.assertFalse(self.backend.supports(path))
+
+    def test_spanned_zip_detected_from_disk_number(self):
+        path = self._zip("last.zip", {"a.txt": b"a"})
+        with open(path, "r+b") as f:
+            data = f.read()
+            pos = data.rfind(b"PK\x05\x06")
+            # EOCD: 本卷号 = 1，中央目录起始卷号 = 1
+            f.seek(pos + 4)
+            f.write(b"\x01\x00\x01\x00")
+        self.assertFalse(self.backend.supports(path))
+
+
+class ParseListingTest(unittest.TestCase):
+    def test_rar_technical_listing(self):
+        text = ("RAR 7.00\r\n\r\nArchive: x.rar\r\nDetails: RAR 5\r\n\r\n"
+                "        Name: big.mkv\r\n        Type: File\r\n        Size: 9000\r\n"
+                "       Flags: encrypted\r\n\r\n"
+                "        Name: sub\r\n        Type: Directory\r\n\r\n"
+                "     Service: QO\r\n        Size: 40\r\n")
+        entries = _parse_listing(text, "rar")
+        self.assertEqual([e["name"] for e in entries], ["big.mkv", "sub"])
+        self.assertEqual(entries[0]["size"], 9000)
+        self.assertTrue(entries[0]["encrypted"])
+        self.assertTrue(entries[1]["dir"])
+
+    def test_7z_slt_listing(self):
+        text = ("Path = x.7z\nType = 7z\nPhysical Size = 300\n\n----------\n"
+                "Path = a.txt\nSize = 12\nPacked Size = 10\nFolder = -\nEncrypted = -\n\n"
+                "Path = d\nSize = 0\nFolder = +\nEncrypted = -\n")
+        entries = _parse_listing(text, "7z")
+        self.assertEqual([(e["name"], e["size"], e["dir"], e["encrypted"]) for e in entries],
+                         [("a.txt", 12, False, False), ("d", 0, True, False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import random
+import zipfile
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from benchmarks.unpack_bench import _write_encrypted_zip
+from src.core.unpack_engine import UnpackEngine
+from src.core.unpack_journal import UnpackJournal
+
+
+class _RaceEngine(UnpackEngine):
+    """
+    复现“尝试进行中目录扫描结束”：第一次尝试开始后才放行说明文件的扫描，
+    并且该尝试一直持续到扫描结束才返回
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.attempt_started = threading.Event()
+
+    def _discover(self, source_folder):
+        for kind, item in super()._discover(source_folder):
+            if kind == "pwd":
+                self.attempt_started.wait(10)
+            yield kind, item
+
+    def _try_unpack_with_pool(self, *args):
+        first = not self.attempt_started.is_set()
+        self.attempt_started.set()
+        result = super()._try_unpack_with_pool(*args)
+        if first:
+            self._discovery_done.wait(10)
+        return result
+
+
+class UnpackEngineTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.home = os.path.join(self._tmp.name, "home")
+        self.src = os.path.join(self._tmp.name, "src")
+        os.makedirs(self.src)
+        env = mock.patch.dict(os.environ, {"TOOLBOX_HOME": self.home})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _cfg(self, **overrides) -> dict:
+        cfg = {"source_folder": self.src, "output_mode": "current_smart", "custom_output_path": "",
+               "engine": "WinRAR", "engine_path": "", "max_workers": 2, "use_index": False,
+               "password_stats": False, "per_device_limits": False}
+        cfg.update(overrides)
+        return cfg
+
+    def _run(self, cfg: dict, engine_cls=UnpackEngine):
+        done = threading.Event()
+        logs, result = [], {}
+        engine = engine_cls(lambda msg, level="info": logs.append(msg), lambda _v: None,
+                            lambda stats, aborted=False: (result.update(stats=dict(stats), aborted=aborted),
+                                                          done.set()))
+        engine.start_task(cfg, "")
+        self.assertTrue(done.wait(30), "engine did not finish")
+        return result["stats"], logs
+
+    def _zip(self, rel: str, files: dict) -> str:
+        path = os.path.join(self.src, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with zipfile.ZipFile(path, "w") as zf:
+            for name, data in files.items():
+                zf.writestr(name, data)
+        return path
+
+    def test_extracts_plain_archives(self):
+        self._zip("a.zip", {"x.txt": b"x"})
+        self._zip("sub/b.zip", {"y.txt": b"y"})
+        stats, _ = self._run(self._cfg())
+        self.assertEqual((stats["success"], stats["fail"], stats["total"]), (2, 0, 2))
+        self.assertTrue(os.path.isfile(os.path.join(self.src, "a", "x.txt")))
+        self.assertTrue(os.path.isfile(os.path.join(self.src, "sub", "b", "y.txt")))
+
+    def test_deferred_archive_is_retried_with_password_found_later(self):
+        os.makedirs(os.path.join(self.src, "a"))
+        os.makedirs(os.path.join(self.src, "b"))
+        _write_encrypted_zip(os.path.join(self.src, "a", "enc.zip"), {"s.bin": b"s" * 1000}, "secret",
+                             random.Random(3))
+        with open(os.path.join(self.src, "b", "readme.txt"), "w", encoding="utf-8") as f:
+            f.write("密码: secret\n")
+        stats, logs = self._run(self._cfg(max_workers=1), _RaceEngine)
+        self.assertEqual((stats["success"], stats["fail"]), (1, 0), logs)
+        self.assertTrue(os.path.isfile(os.path.join(self.src, "a", "enc", "s.bin")))
+
+    def test_resume_skips_successes_and_retries_failures(self):
+        done = self._zip("done.zip", {"x.txt": b"x"})
+        failed = self._zip("failed.zip", {"y.txt": b"y"})
+        cfg = self._cfg()
+        journal = UnpackJournal(UnpackJournal.path_for(os.path.join(self.home, "config", "journal"), cfg))
+        journal.finished(done, os.stat(done), "success")
+        journal.finished(failed, os.stat(failed), "fail")
+        journal.close(completed=False)
+
+        stats, _ = self._run(cfg)
+        self.assertEqual((stats["success"], stats["skipped"]), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.src, "done")))
+        self.assertTrue(os.path.isfile(os.path.join(self.src, "failed", "y.txt")))
+        # 整批完成后日志删除
+        self.assertFalse(os.path.exists(journal.path))
+
+    def test_incomplete_and_orphan_volumes(self):
+        for name in ("v.part1.rar", "v.part3.rar", "notes.002"):
+            with open(os.path.join(self.src, name), "wb") as f:
+                f.write(b"x")
+        stats, logs = self._run(self._cfg())
+        # 缺第 2 卷的分卷组判失败；没有首卷的 notes.002 只忽略
+        self.assertEqual((stats["total"], stats["fail"]), (1, 1))
+        self.assertTrue(any("notes.002" in m for m in logs))
+
+    def test_missing_source_leaves_no_journal(self):
+        stats, _ = self._run(self._cfg(source_folder=os.path.join(self._tmp.name, "nope")))
+        self.assertEqual(stats["total"], 0)
+        self.assertFalse(os.path.exists(os.path.join(self.home, "config", "journal")))
+
+
+if __name__ == "__main__":
+    unittest.main()
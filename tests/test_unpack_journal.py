@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from src.core.unpack_journal import UnpackJournal, commit_staging, staging_dir_for
+
+
+class UnpackJournalTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        self.path = os.path.join(self.dir, "journal", "run.jsonl")
+        self.a = self._file("a.zip", b"a")
+        self.b = self._file("b.zip", b"b")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _file(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_fresh_journal_is_empty_but_truthy(self):
+        journal = UnpackJournal(self.path)
+        self.assertTrue(journal.is_empty())
+        self.assertTrue(journal)
+        journal.close(completed=False)
+
+    def test_replay_skips_only_successes(self):
+        journal = UnpackJournal(self.path)
+        journal.started(self.a, "/tmp/stage-a")
+        journal.finished(self.a, os.stat(self.a), "success")
+        journal.finished(self.b, os.stat(self.b), "fail")
+        journal.close(completed=False)
+
+        resumed = UnpackJournal(self.path)
+        self.assertFalse(resumed.is_empty())
+        self.assertTrue(resumed.is_finished(self.a, os.stat(self.a)))
+        # 失败的在续传时重新尝试
+        self.assertFalse(resumed.is_finished(self.b, os.stat(self.b)))
+        self.assertEqual(resumed.finished_count(), 1)
+        self.assertEqual(resumed.interrupted_staging(), [])
+        resumed.close(completed=True)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_changed_file_is_not_skipped(self):
+        journal = UnpackJournal(self.path)
+        journal.finished(self.a, os.stat(self.a), "success")
+        journal.close(completed=False)
+        self._file("a.zip", b"changed")
+        resumed = UnpackJournal(self.path)
+        self.assertFalse(resumed.is_finished(self.a, os.stat(self.a)))
+        resumed.close(completed=False)
+
+    def test_interrupted_start_and_torn_last_line(self):
+        journal = UnpackJournal(self.path)
+        journal.started(self.a, "/tmp/stage-a")
+        journal.close(completed=False)
+        # 断电时最后一行只写了一半
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"event": "success", "pa')
+        resumed = UnpackJournal(self.path)
+        self.assertEqual(resumed.interrupted_staging(), ["/tmp/stage-a"])
+        self.assertFalse(resumed.is_finished(self.a, os.stat(self.a)))
+        resumed.close(completed=False)
+
+
+class StagingTest(unittest.TestCase):
+    def test_commit_renames_or_merges(self):
+        with tempfile.TemporaryDirectory() as d:
+            archive = os.path.join(d, "a.zip")
+            dest = os.path.join(d, "a")
+            staging = staging_dir_for(archive, dest)
+            self.assertEqual(os.path.dirname(staging), d)
+            os.makedirs(os.path.join(staging, "sub"))
+            with open(os.path.join(staging, "sub", "x.txt"), "w") as f:
+                f.write("1")
+            commit_staging(staging, dest)
+            self.assertTrue(os.path.isfile(os.path.join(dest, "sub", "x.txt")))
+            self.assertFalse(os.path.exists(staging))
+
+            # 目标已存在：临时目录放在目标内，逐项合并，同名文件覆盖
+            staging = staging_dir_for(archive, dest)
+            self.assertEqual(os.path.dirname(staging), dest)
+            os.makedirs(os.path.join(staging, "sub"))
+            with open(os.path.join(staging, "sub", "x.txt"), "w") as f:
+                f.write("2")
+            with open(os.path.join(staging, "y.txt"), "w") as f:
+                f.write("3")
+            commit_staging(staging, dest)
+            with open(os.path.join(dest, "sub", "x.txt")) as f:
+                self.assertEqual(f.read(), "2")
+            self.assertTrue(os.path.isfile(os.path.join(dest, "y.txt")))
+            self.assertFalse(os.path.exists(staging))
+
+
+if __name__ == "__main__":
+    unittest.main()